@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark the batched integration of CrossSections.compute_loads against the panel loop
+
+import numpy as np
+import time
+
+def get_config():
+    """Inputs definition
+    """
+    return {
+        'Sections': 200, # number of cross-sections
+        'Points': 2000, # number of points per cross-section
+        'AoA': 3.06 # angle of attack (degrees)
+    }
+
+def create_sections(cfg):
+    """Create cross-sections of a NACA 0012 wing with an analytic pressure distribution
+    """
+    from pycfdutils.cross_sections import CrossSections
+    loads = CrossSections()
+    n = cfg['Points'] // 2 + 1
+    x = 0.5 * (1 - np.cos(np.linspace(0, np.pi, n)))
+    z = 0.6 * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x**2 + 0.2843 * x**3 - 0.1036 * x**4)
+    xz = np.vstack((np.column_stack((x[::-1], z[::-1])), np.column_stack((x[1:], -z[1:]))))
+    for y in np.linspace(0., 1., cfg['Sections']):
+        cp = (1 - 4 * (xz[:, 1] + 0.02 * (1 - y))**2 - xz[:, 0]).reshape(-1, 1)
+        loads.add_section(y, xz, cp)
+    return loads
+
+def loop_loads(loads, aoa):
+    """Reference implementation looping over every panel of every section
+    """
+    aoa = np.deg2rad(aoa)
+    cls, cms, cds = [], [], []
+    for i in range(len(loads.y_sec)):
+        xc = loads.xz_c[i][:, 0]
+        zc = loads.xz_c[i][:, 1]
+        cp = loads.cp[i][:, 0]
+        cz = 0
+        cx = 0
+        cm = 0
+        for j in range(len(xc) - 1):
+            dx = xc[j + 1] - xc[j]
+            dz = -(zc[j + 1] - zc[j])
+            cz -= 0.5 * dx * (cp[j + 1] + cp[j])
+            cx -= 0.5 * dz * (cp[j + 1] + cp[j])
+            cm -= -0.5 * (cp[j + 1] * (xc[j + 1] - 0.25) + cp[j] * (xc[j] - 0.25)) * dx + 0.5 * (cp[j + 1] * zc[j + 1] + cp[j] * zc[j]) * dz
+        cls.append(cz * np.cos(aoa) - cx * np.sin(aoa))
+        cms.append(cm)
+        cds.append(cz * np.sin(aoa) + cx * np.cos(aoa))
+    return np.array(cls), np.array(cms), np.array(cds)
+
+def main():
+    # Get inputs
+    cfg = get_config()
+    loads = create_sections(cfg)
+    print(f'--- {cfg["Sections"]} sections of {cfg["Points"]} points ---')
+    # Loop
+    tic = time.perf_counter()
+    cl, cm, cd = loop_loads(loads, cfg['AoA'])
+    t_loop = time.perf_counter() - tic
+    # Batch
+    tic = time.perf_counter()
+    loads.compute_loads(cfg['AoA'])
+    t_batch = time.perf_counter() - tic
+    # Compare
+    err = max(np.max(np.abs(cl - loads.cl)), np.max(np.abs(cm - loads.cm)), np.max(np.abs(cd - loads.cd)))
+    print(f'loop:    {t_loop:.4f} s')
+    print(f'batch:   {t_batch:.4f} s')
+    print(f'speedup: {t_loop / t_batch:.1f}x')
+    print(f'max abs difference: {err:.3e}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark the memory used by Reader.open when loading all the arrays or only the ones needed for slicing
+
+import subprocess
+import sys
+
+def get_config():
+    """Inputs definition
+    """
+    return {
+        'Resolution': 1000, # number of points along each direction of the surface
+        'Arrays': 30, # number of additional arrays in the file
+        'Formats': ['.vtu', '.vtk'], # file formats
+        'Selection': ['Cp', 'tag'] # arrays needed for slicing
+    }
+
+def create_file(cfg, fname):
+    """Create a surface grid containing the pressure coefficient, a tag and many other arrays
+    """
+    import vtk
+    from vtk.util.numpy_support import vtk_to_numpy, numpy_to_vtk
+    import numpy as np
+    plane = vtk.vtkPlaneSource()
+    plane.SetResolution(cfg['Resolution'] - 1, cfg['Resolution'] - 1)
+    tri = vtk.vtkTriangleFilter()
+    tri.SetInputConnection(plane.GetOutputPort())
+    append = vtk.vtkAppendFilter()
+    append.SetInputConnection(tri.GetOutputPort())
+    append.Update()
+    grid = append.GetOutput()
+    pts = vtk_to_numpy(grid.GetPoints().GetData())
+    for i in range(cfg['Arrays'] + 1):
+        vals = numpy_to_vtk(np.sin(i * pts[:, 0]) * np.cos(pts[:, 1]), deep=1)
+        vals.SetName('Cp' if i == 0 else f'Field_{i}')
+        grid.GetPointData().AddArray(vals)
+    tag = numpy_to_vtk(np.ones(grid.GetNumberOfCells(), dtype=np.int32), deep=1)
+    tag.SetName('tag')
+    grid.GetCellData().AddArray(tag)
+    writer = vtk.vtkXMLUnstructuredGridWriter() if fname.endswith('.vtu') else vtk.vtkUnstructuredGridWriter()
+    writer.SetFileName(fname)
+    writer.SetInputData(grid)
+    writer.Write()
+
+def measure(fname, arrays):
+    """Open a file in a new process and return the peak memory of the process and the memory retained by the grid (MiB)
+    """
+    # the peak is read from /proc (Linux only), since ru_maxrss is inherited from the parent process
+    script = f"""
+from pycfdutils.vtk_utils import Reader
+reader = Reader()
+reader.open({fname!r}, arrays={arrays!r})
+peak = [int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM')][0]
+print(peak / 1024, reader.grid.GetActualMemorySize() / 1024)
+"""
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    return [float(v) for v in out.split()]
+
+def main():
+    import os, tempfile
+    # Get inputs
+    cfg = get_config()
+    print(f'--- {cfg["Resolution"]**2} points, {cfg["Arrays"] + 2} arrays ---')
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in cfg['Formats']:
+            fname = os.path.join(tmp, 'grid' + fmt)
+            create_file(cfg, fname)
+            peak_all, grid_all = measure(fname, None)
+            peak_sel, grid_sel = measure(fname, cfg['Selection'])
+            print(f'{fmt}: all arrays:      peak {peak_all:8.1f} MiB, grid {grid_all:8.1f} MiB')
+            print(f'{fmt}: selected arrays: peak {peak_sel:8.1f} MiB, grid {grid_sel:8.1f} MiB')
+            print(f'{fmt}: saved:           peak {peak_all - peak_sel:8.1f} MiB, grid {grid_all - grid_sel:8.1f} MiB')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+# test encoding: à-é-è-ô-ï-€
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark the reading, cutting (with VTK and numpy), extraction and integration on synthetic wing meshes, and save the timings as JSON
+# usage: python suite.py [-s SIZE [SIZE ...]] [-o OUTPUT]
+
+import numpy as np
+import time
+
+def get_config():
+    """Inputs definition
+    """
+    return {
+        'Sizes': [10**4, 10**5, 10**6], # approximate number of cells of the meshes (up to 10**7)
+        'Meshes': ['surface', 'volume'], # types of mesh
+        'Formats': ['.vtu', '.vtk', '.dat'], # file formats
+        'Cuts': 50, # number of cross-sections used to compute the loads
+        'Stations': 100, # number of cutplanes created by Cutter.cut_many
+        'Repeat': 3, # number of repetitions of each measurement, the minimum is kept
+        'AoA': 3.06, # angle of attack (degrees)
+        'Output': 'benchmarks.json' # name of output file
+    }
+
+def measure(fun, repeat):
+    """Return the minimum wall time (s) of several calls to a function
+    """
+    times = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - tic)
+    return min(times)
+
+def run(cfg, mesh, size, tmp):
+    """Time each operation on one mesh and return the results
+    """
+    import contextlib, io, os
+    from pycfdutils import meshes
+    from pycfdutils.vtk_utils import Reader, Cutter, _grid_to_numpy
+    from pycfdutils.slicing import NumpyCutter
+    from pycfdutils.cross_sections import CrossSections
+    grid = meshes.surface(size) if mesh == 'surface' else meshes.volume(size)
+    info = {'mesh': mesh, 'size': size, 'points': grid.GetNumberOfPoints(), 'cells': grid.GetNumberOfCells()}
+    results = []
+    def add(name, t, **kwargs):
+        results.append({**info, 'benchmark': name, **kwargs, 'time': t})
+        print(f'{mesh:>7s} {info["cells"]:>9d} cells: {name:<28s} {kwargs.get("format", ""):<4s} {t:10.4f} s')
+    # Reader.open
+    for fmt in cfg['Formats']:
+        fname = os.path.join(tmp, mesh + fmt)
+        meshes.write(grid, fname)
+        add('Reader.open', measure(lambda: Reader().open(fname), cfg['Repeat']), format=fmt)
+        os.remove(fname)
+    # Cutter.cut and Cutter.extract, at mid-span
+    tag_dim = 2 if mesh == 'surface' else 3
+    cutter = Cutter(grid)
+    add('Cutter.cut', measure(lambda: cutter.cut([0., 0.5, 0.], [0., 1., 0.]), cfg['Repeat']))
+    add('Cutter.extract', measure(lambda: cutter.extract(['Cp'], tag_dim, sort=tag_dim == 2), cfg['Repeat']), sort=tag_dim == 2)
+    # Cutter.cut_many, compared to one call to Cutter.cut per cutplane (including the index of a new cutter)
+    y_cuts = np.linspace(0.005, 0.995, cfg['Stations'])
+    def cut_loop():
+        _cutter = Cutter(grid)
+        for y in y_cuts:
+            _cutter.cut([0., y, 0.], [0., 1., 0.])
+    add('Cutter.cut_many', measure(lambda: Cutter(grid).cut_many([[0., y, 0.] for y in y_cuts], [0., 1., 0.]), cfg['Repeat']), cuts=len(y_cuts))
+    add('Cutter.cut (loop)', measure(cut_loop, cfg['Repeat']), cuts=len(y_cuts))
+    # NumpyCutter.cut and NumpyCutter.extract, at mid-span (surface cutplanes only)
+    if mesh == 'surface':
+        ncutter = NumpyCutter(_grid_to_numpy(grid))
+        add('NumpyCutter.cut', measure(lambda: ncutter.cut([0., 0.5, 0.], [0., 1., 0.]), cfg['Repeat']))
+        add('NumpyCutter.extract', measure(lambda: ncutter.extract(['Cp'], 2), cfg['Repeat']), sort=True)
+    # CrossSections.compute_loads and CrossSections.write, from sections of the wing surface
+    if mesh == 'surface':
+        y_secs = np.linspace(0.02, 0.98, cfg['Cuts'])
+        cutter.cut_many([[0., y, 0.] for y in y_secs], [0., 1., 0.], 'tag', 5)
+        sections = []
+        for i, y in enumerate(y_secs):
+            pts, _, vals = cutter.extract(['Cp'], 2, copy=True, slice_id=i)
+            sections.append((y, pts[:, [0, 2]], vals['Cp']))
+        def compute():
+            loads = CrossSections()
+            for y, xz, cp in sections:
+                loads.add_section(y, xz, cp)
+            loads.compute_loads(cfg['AoA'])
+            return loads
+        add('CrossSections.compute_loads', measure(compute, cfg['Repeat']), sections=len(sections))
+        loads = compute()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                t = measure(loads.write, cfg['Repeat'])
+                t_bin = measure(lambda: loads.write(binary=True), cfg['Repeat'])
+            add('CrossSections.write', t, sections=len(sections), binary=False)
+            add('CrossSections.write', t_bin, sections=len(sections), binary=True)
+        finally:
+            os.chdir(cwd)
+    return results
+
+def main():
+    import argparse, json, os, platform, tempfile
+    import vtk
+    import pycfdutils
+    # Get inputs
+    cfg = get_config()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--sizes', nargs='+', type=float, help='approximate number of cells of the meshes')
+    parser.add_argument('-o', '--output', help='name of output file')
+    args = parser.parse_args()
+    if args.sizes:
+        cfg['Sizes'] = [int(s) for s in args.sizes]
+    if args.output:
+        cfg['Output'] = args.output
+    # Run the benchmarks
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in cfg['Sizes']:
+            for mesh in cfg['Meshes']:
+                results += run(cfg, mesh, size, tmp)
+    # Save the results
+    report = {
+        'version': pycfdutils.__version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'vtk': vtk.vtkVersion.GetVTKVersion(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': cfg,
+        'results': results
+    }
+    with open(cfg['Output'], 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {cfg["Output"]}')
+
+if __name__ == "__main__":
+    main()
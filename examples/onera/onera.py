@@ -41,9 +41,9 @@ def compute_loads(cfg):
     # Create slices
     cutter = Cutter(reader.grid)
     loads = CrossSections()
+    cutter.cut_many([[0., y, 0.] for y in cfg['Cuts']], [0., 1., 0.], cfg['Tag'][0], cfg['Tag'][1])
     for i in range(len(cfg['Cuts'])):
-        cutter.cut([0., cfg['Cuts'][i], 0.], [0., 1., 0.], cfg['Tag'][0], cfg['Tag'][1])
-        pts, elems, vals = cutter.extract([cfg['Variable']], 2)
+        pts, elems, vals = cutter.extract([cfg['Variable']], 2, slice_id=i)
         loads.add_section(cfg['Cuts'][i], pts[:, [0, 2]], vals[cfg['Variable']])
     # Compute loads
     loads.compute_loads(cfg['AoA'])
@@ -18,4 +18,12 @@
 __version__ = '1.1.0'
 
 from .cross_sections import *
+from .tecplot import *
 from .vtk_utils import *
+from .slicing import *
+from .parallel import *
+from .cache import *
+from .profiling import *
+from .spanload import *
+from .surface_loads import *
+from .jobs import *
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# VTK modules, imported on first use so that the parts of the package that do not need VTK load quickly and without it
+
+import importlib
+
+class _LazyModule:
+    """Module imported on first attribute access
+
+    Parameters:
+    name: str
+        name of module
+    parts: list of str
+        names of the modules in which attributes are looked for first, imported one after the other, so that the whole module is
+        imported only if they do not contain the attribute (default: None)
+    """
+    def __init__(self, name, parts=None):
+        self.__name = name
+        self.__parts = parts if parts else []
+        self.__module = None
+
+    def __getattr__(self, attr):
+        for part in self.__parts:
+            module = _import(part)
+            if hasattr(module, attr):
+                value = getattr(module, attr)
+                break
+        else:
+            if self.__module is None:
+                self.__module = _import(self.__name)
+            value = getattr(self.__module, attr)
+        setattr(self, attr, value) # next accesses do not go through __getattr__
+        return value
+
+def _import(name):
+    """Import a VTK module
+
+    Parameters:
+    name: str
+        name of module
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise RuntimeError('VTK not found!\n')
+
+# Importing the whole vtk module takes several times longer than importing the modules used by the package
+vtk = _LazyModule('vtk', ['vtkmodules.vtkCommonCore', 'vtkmodules.vtkCommonDataModel', 'vtkmodules.vtkFiltersCore', 'vtkmodules.vtkIOXML', 'vtkmodules.vtkIOLegacy', 'vtkmodules.vtkIOGeometry'])
+_numpy_support = _LazyModule('vtkmodules.util.numpy_support')
+
+def vtk_to_numpy(*args, **kwargs):
+    return _numpy_support.vtk_to_numpy(*args, **kwargs)
+
+def numpy_to_vtk(*args, **kwargs):
+    return _numpy_support.numpy_to_vtk(*args, **kwargs)
+
+def numpy_to_vtkIdTypeArray(*args, **kwargs):
+    return _numpy_support.numpy_to_vtkIdTypeArray(*args, **kwargs)
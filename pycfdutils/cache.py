@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+__all__ = ['GridCache']
+
+class GridCache:
+    """Manage an on-disk cache of grids read from solution files
+
+    Each grid is stored as a directory of uncompressed .npy files, which are memory-mapped when the grid is loaded.
+    An entry is identified by the path, size and modification time of the solution file, and by the selected arrays
+    and blocks. The least recently used entries are evicted when the cache exceeds its maximum size.
+
+    Parameters:
+    directory: str
+        path of the cache directory (default: None, ~/.cache/pycfdutils)
+    max_size: int
+        maximum size of the cache in bytes (default: 2**32)
+
+    Attributes:
+    directory: str
+        path of the cache directory
+    max_size: int
+        maximum size of the cache in bytes
+    """
+    def __init__(self, directory=None, max_size=2**32):
+        self.directory = directory if directory else os.path.join(os.path.expanduser('~'), '.cache', 'pycfdutils')
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, fname, arrays=None, blocks=None):
+        """Load the arrays of a grid from the cache
+
+        Parameters:
+        fname: str
+            name of grid file
+        arrays: array
+            names of point and cell data that were loaded (default: None)
+        blocks: array
+            indices or names of blocks that were loaded (default: None)
+
+        Returns:
+        data: dict
+            name-ndarray dictionnary of memory-mapped grid and data, or None if the grid is not in cache
+        """
+        entry = os.path.join(self.directory, self.__key(fname, arrays, blocks))
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+            data = {name: np.load(os.path.join(entry, file), mmap_mode='c') for name, file in meta['files'].items()}
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(os.path.join(entry, 'meta.json')) # mark as recently used
+        return data
+
+    def store(self, fname, data, arrays=None, blocks=None):
+        """Store the arrays of a grid in the cache
+
+        Parameters:
+        fname: str
+            name of grid file
+        data: dict
+            name-ndarray dictionnary of grid and data
+        arrays: array
+            names of point and cell data that were loaded (default: None)
+        blocks: array
+            indices or names of blocks that were loaded (default: None)
+        """
+        key = self.__key(fname, arrays, blocks)
+        source = os.path.abspath(fname)
+        stat = os.stat(fname)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        # Write entry in a temporary directory and rename it, so that incomplete entries are never read
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp')
+        meta = {'source': source, 'stamp': stamp, 'files': {}, 'size': 0}
+        for i, (name, array) in enumerate(data.items()):
+            file = f'{i}.npy'
+            np.save(os.path.join(tmp, file), np.ascontiguousarray(array))
+            meta['files'][name] = file
+            meta['size'] += os.path.getsize(os.path.join(tmp, file))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        entry = os.path.join(self.directory, key)
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError: # entry written concurrently by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+        # Remove the entries of previous versions of the file and evict the least recently used entries
+        entries = self.__entries()
+        for e in [e for e in entries if e[2] == source and e[4] != stamp]:
+            shutil.rmtree(os.path.join(self.directory, e[3]), ignore_errors=True)
+            entries.remove(e)
+        size = sum(e[1] for e in entries)
+        for e in sorted(entries):
+            if size <= self.max_size:
+                break
+            shutil.rmtree(os.path.join(self.directory, e[3]), ignore_errors=True)
+            size -= e[1]
+
+    def clear(self):
+        """Remove all the entries from the cache
+        """
+        for e in self.__entries():
+            shutil.rmtree(os.path.join(self.directory, e[3]), ignore_errors=True)
+
+    def __key(self, fname, arrays, blocks):
+        """Compute the identifier of an entry
+
+        Parameters:
+        fname: str
+            name of grid file
+        arrays: array
+            names of point and cell data
+        blocks: array
+            indices or names of blocks
+        """
+        stat = os.stat(fname)
+        key = [os.path.abspath(fname), stat.st_size, stat.st_mtime_ns, sorted(arrays) if arrays is not None else None, list(blocks) if blocks is not None else None]
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+    def __entries(self):
+        """List the entries as (last access time, size, source, key, source size and modification time)
+        """
+        entries = []
+        for key in os.listdir(self.directory):
+            if key.startswith('.tmp'):
+                continue
+            try:
+                mfile = os.path.join(self.directory, key, 'meta.json')
+                with open(mfile) as f:
+                    meta = json.load(f)
+                entries.append((os.path.getmtime(mfile), meta['size'], meta['source'], key, meta['stamp']))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
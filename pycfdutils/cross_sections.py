@@ -16,39 +16,91 @@
 # limitations under the License.
 
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from .profiling import _stage
+
+__all__ = ['CrossSections', 'CrossSectionsFile']
 
 class CrossSections:
     """Manage cross-sectional data along the wing span
 
+    The data of all the cross-sections are stored in flat arrays, the points of each cross-section being indexed by offsets
+    (compressed sparse row layout). The arrays are grown by doubling their capacity when sections are added. The loads in
+    body axes are kept for each cross-section, so that only the sections added since the last computation are integrated.
+
+    Parameters:
+    profiler: Profiler
+        profiler recording the stages of the computation (default: None)
+
     Attributes:
-    y_sec: array
+    y_sec: ndarray
         y-coordinate of cross-sections
-    chords: array
+    chords: ndarray
         chord length of cross-sections
-    xz_le: array
+    xz_le: ndarray
         x and z-coordinates of cross-sections leading edge
-    xz_c: array
-        x and z-coordinates of cross-sections normalized by chord
-    cp: array
-        pressure coefficients along the chord of cross-sections
-    cl: array
+    offsets: ndarray
+        index of the first point of each cross-section in the flat arrays, and total number of points
+    xz_c: sequence of ndarray
+        x and z-coordinates of cross-sections normalized by chord (views on a flat array)
+    cp: sequence of ndarray
+        pressure coefficients along the chord of cross-sections (views on a flat array)
+    cl: ndarray
         spanwise lift distribution
-    cm: array
+    cm: ndarray
         spanwise moment distribution
-    cd: array
+    cd: ndarray
         spanwise drag distribution
+    profiler: Profiler
+        profiler recording the stages of the computation
     """
-    def __init__(self):
+    def __init__(self, profiler=None):
         # Geometry
-        self.y_sec = []
-        self.chords = []
-        self.xz_le = []
-        self.xz_c = []
+        self.__n_sec = 0
+        self.__y = np.zeros(0)
+        self.__chords = np.zeros(0)
+        self.__xz_le = np.zeros((0, 2))
+        self.__offsets = np.zeros(1, dtype=np.int64)
+        self.__xz_c = np.zeros((0, 2))
         # Loads
-        self.cp = []
-        self.cl = []
-        self.cm = []
-        self.cd = []
+        self.__cp = np.zeros((0, 1))
+        self.__n_int = 0 # number of integrated sections
+        self.__cz = np.zeros(0)
+        self.__cx = np.zeros(0)
+        self.__cmq = np.zeros(0)
+        self.cl = np.zeros(0)
+        self.cm = np.zeros(0)
+        self.cd = np.zeros(0)
+        self.profiler = profiler
+
+    @property
+    def y_sec(self):
+        return self.__y[:self.__n_sec]
+
+    @property
+    def chords(self):
+        return self.__chords[:self.__n_sec]
+
+    @property
+    def xz_le(self):
+        return self.__xz_le[:self.__n_sec]
+
+    @property
+    def offsets(self):
+        return self.__offsets[:self.__n_sec + 1]
+
+    @property
+    def xz_c(self):
+        return _Sections(self.__xz_c[:self.__offsets[self.__n_sec]], self.offsets)
+
+    @property
+    def cp(self):
+        return _Sections(self.__cp[:self.__offsets[self.__n_sec]], self.offsets)
+
+    def __len__(self):
+        return self.__n_sec
 
     def add_section(self, y, xz, cp):
         """Add cross-sectional data
@@ -57,51 +109,274 @@ class CrossSections:
         y: float
             y-coordinate of cross-section
         xz: ndarray
-            x and z-coordinates of cross-section
+            x and z-coordinates of cross-section, sorted clockwise (along the lower side first, as given by Cutter.extract)
         cp: array
             pressure coefficients along the chord of cross-section
         """
+        n = xz.shape[0]
+        cp = np.asarray(cp).reshape(n, -1)
+        if self.__n_sec == 0:
+            self.__cp = np.zeros((0, cp.shape[1]))
+        elif cp.shape[1] != self.__cp.shape[1]:
+            raise RuntimeError(f'pressure coefficients must have {self.__cp.shape[1]} components but {cp.shape[1]} were given!\n')
+        self.__reserve(self.__n_sec + 1, self.__offsets[self.__n_sec] + n)
         # Normalize coordinates
         ile = np.argmin(xz[:, 0]) # LE index
         c = max(xz[:, 0]) - min(xz[:, 0]) # chord length
-        xzc = np.zeros((xz.shape[0], 2))
+        begin = self.__offsets[self.__n_sec]
+        xzc = self.__xz_c[begin:begin + n]
         xzc[:,0] = (xz[:,0] - xz[ile,0]) / c
         xzc[:,1] = (xz[:,1] - xz[ile,1]) / c
         # Add data
-        self.y_sec.append(y)
-        self.chords.append(c)
-        self.xz_le.append(xz[ile, :])
-        self.xz_c.append(xzc)
-        self.cp.append(cp)
+        i = self.__n_sec
+        self.__y[i] = y
+        self.__chords[i] = c
+        self.__xz_le[i] = xz[ile, :]
+        self.__cp[begin:begin + n] = cp
+        self.__offsets[i + 1] = begin + n
+        self.__n_sec += 1
+
+    def __reserve(self, n_sec, n_pts):
+        """Grow the arrays, doubling their capacity, so that they can hold a given number of sections and points
+
+        Parameters:
+        n_sec: int
+            number of sections
+        n_pts: int
+            number of points
+        """
+        if n_sec > len(self.__y):
+            cap = max(n_sec, 2 * len(self.__y), 16)
+            self.__y = self.__grow(self.__y, cap)
+            self.__chords = self.__grow(self.__chords, cap)
+            self.__xz_le = self.__grow(self.__xz_le, cap)
+            self.__offsets = self.__grow(self.__offsets, cap + 1)
+            self.__cz = self.__grow(self.__cz, cap)
+            self.__cx = self.__grow(self.__cx, cap)
+            self.__cmq = self.__grow(self.__cmq, cap)
+        if n_pts > len(self.__xz_c):
+            cap = max(n_pts, 2 * len(self.__xz_c), 1024)
+            self.__xz_c = self.__grow(self.__xz_c, cap)
+            self.__cp = self.__grow(self.__cp, cap)
+
+    def __grow(self, array, cap):
+        """Copy an array into a larger one
+
+        Parameters:
+        array: ndarray
+            array to grow along its first dimension
+        cap: int
+            new size of the first dimension
+        """
+        new = np.zeros((cap,) + array.shape[1:], dtype=array.dtype)
+        new[:len(array)] = array
+        return new
+
+    def __getstate__(self):
+        """Get the state to pickle, containing only the used part of the arrays
+        """
+        return {'y_sec': self.y_sec, 'chords': self.chords, 'xz_le': self.xz_le, 'offsets': self.offsets,
+                'xz_c': self.__xz_c[:self.offsets[-1]], 'cp': self.__cp[:self.offsets[-1]],
+                'cl': self.cl, 'cm': self.cm, 'cd': self.cd}
+
+    def __setstate__(self, state):
+        """Set the state from pickled data
+        """
+        self.__init__()
+        self._set_arrays(state)
+
+    def _set_arrays(self, arrays):
+        """Use arrays as data, without copying them
+
+        Parameters:
+        arrays: dict
+            name-ndarray dictionnary of y_sec, chords, xz_le, offsets, xz_c, cp, cl, cm and cd
+        """
+        self.__n_sec = len(arrays['y_sec'])
+        self.__y = arrays['y_sec']
+        self.__chords = arrays['chords']
+        self.__xz_le = arrays['xz_le']
+        self.__offsets = arrays['offsets']
+        self.__xz_c = arrays['xz_c']
+        self.__cp = arrays['cp']
+        self.__n_int = 0
+        self.__cz = np.zeros(self.__n_sec)
+        self.__cx = np.zeros(self.__n_sec)
+        self.__cmq = np.zeros(self.__n_sec)
+        self.cl = arrays['cl']
+        self.cm = arrays['cm']
+        self.cd = arrays['cd']
 
     def compute_loads(self, aoa=0):
         """Compute sectional aerodynamic load coefficients
 
         Parameters:
-        aoa: float
-            angle of attack in degrees (default: 0.)
+        aoa: float or array
+            angle of attack in degrees, or several angles of attack (default: 0.)
+
+        Returns:
+        cl, cm, cd: ndarray
+            lift, moment and drag coefficients of each section (n_sections), stored in cl, cm and cd, or of each angle of
+            attack and section (n_aoa x n_sections) if several angles are given, which are not stored
         """
-        aoa = np.deg2rad(aoa)
-        for i in range(len(self.y_sec)):
-            xc = self.xz_c[i][:, 0]
-            zc = self.xz_c[i][:, 1]
-            cp = self.cp[i][:, 0]
-            # Integrate pressure coefficient
-            cz = 0
-            cx = 0
-            cm = 0
-            for j in range(len(xc) - 1):
-                dx = xc[j + 1] - xc[j]
-                dz = -(zc[j + 1] - zc[j])
-                cz -= 0.5 * dx * (cp[j + 1] + cp[j])
-                cx -= 0.5 * dz * (cp[j + 1] + cp[j])
-                cm -= -0.5 * (cp[j + 1] * (xc[j + 1] - 0.25) + cp[j] * (xc[j] - 0.25)) * dx + 0.5 * (cp[j + 1] * zc[j + 1] + cp[j] * zc[j]) * dz
+        with _stage(self.profiler, 'CrossSections.compute_loads') as stage:
+            # Integrate pressure coefficient of the sections added since the last computation
+            begin, end = self.__n_int, self.__n_sec
+            if end > begin:
+                offsets = self.__offsets[begin:end + 1]
+                cz, cx, cm = self.__integrate(self.__xz_c[offsets[0]:offsets[-1]], self.__cp[offsets[0]:offsets[-1], 0], offsets - offsets[0])
+                self.__cz[begin:end] = cz
+                self.__cx[begin:end] = cx
+                self.__cmq[begin:end] = cm
+                self.__n_int = end
+                stage.count(offsets[-1] - offsets[0], end - begin)
             # Rotate to flow direction
-            cl = cz * np.cos(aoa) - cx * np.sin(aoa)
-            cd = cz * np.sin(aoa) + cx * np.cos(aoa)
-            self.cl.append(cl)
-            self.cm.append(cm)
-            self.cd.append(cd)
+            alpha = np.deg2rad(np.asarray(aoa, dtype=float))[..., None]
+            cz, cx = self.__cz[:end], self.__cx[:end]
+            cl = cz * np.cos(alpha) - cx * np.sin(alpha)
+            cd = cz * np.sin(alpha) + cx * np.cos(alpha)
+            cm = np.broadcast_to(self.__cmq[:end], cl.shape).copy()
+            if np.ndim(aoa) == 0:
+                self.cl, self.cm, self.cd = cl, cm, cd
+        return cl, cm, cd
+
+    def compute_totals(self, s_ref=None, c_ref=None, x_ref=0.):
+        """Integrate the spanwise load distributions into load coefficients of the wing
+
+        The sectional loads are integrated along the span between the first and last cross-sections (trapezoidal rule).
+        The moment includes the transfer of the sectional lift from the quarter-chord to the reference point, but neglects
+        the vertical offset of the cross-sections and the drag.
+
+        Parameters:
+        s_ref: float
+            reference surface (default: None, planform area between the first and last cross-sections)
+        c_ref: float
+            reference chord (default: None, mean aerodynamic chord between the first and last cross-sections)
+        x_ref: float
+            x-coordinate of the moment reference point (default: 0.)
+
+        Returns:
+        cl, cm, cd: float
+            lift, moment and drag coefficients of the wing
+        """
+        if len(self.cl) != len(self.y_sec):
+            raise RuntimeError(f'loads must be computed once for each of the {len(self.y_sec)} cross-sections before computing total loads!\n')
+        order = np.argsort(self.y_sec, kind='stable')
+        y = np.asarray(self.y_sec, dtype=float)[order]
+        c = np.asarray(self.chords, dtype=float)[order]
+        x_qc = self.xz_le[order, 0] + 0.25 * c
+        cl = np.asarray(self.cl)[order]
+        cd = np.asarray(self.cd)[order]
+        cm = np.asarray(self.cm)[order]
+        # Reference quantities
+        if s_ref is None:
+            s_ref = _trapezoid(c, y)
+        if c_ref is None:
+            c_ref = _trapezoid(c * c, y) / _trapezoid(c, y)
+        # Integrate the sectional loads
+        cl_tot = _trapezoid(cl * c, y) / s_ref
+        cd_tot = _trapezoid(cd * c, y) / s_ref
+        cm_tot = _trapezoid(cm * c * c + cl * c * (x_ref - x_qc), y) / (s_ref * c_ref)
+        return cl_tot, cm_tot, cd_tot
+
+    def resample(self, x_c=None, n_points=101):
+        """Interpolate the pressure coefficient of the upper and lower surfaces of all the cross-sections at common chordwise positions
+
+        Each cross-section is split into two surfaces at its leading edge (smallest x) and trailing edge (largest x),
+        considering its points as a loop, and the surface with the largest mean z is the upper surface. The pressure
+        coefficient is interpolated linearly along x/c on each surface, and extrapolated by the value at the closest end.
+
+        Parameters:
+        x_c: array
+            chordwise positions normalized by chord (default: None, n_points positions with a cosine distribution)
+        n_points: int
+            number of chordwise positions with a cosine distribution (default: 101)
+
+        Returns:
+        x_c: ndarray
+            chordwise positions normalized by chord
+        cp_upper, cp_lower: ndarray
+            pressure coefficients at the chordwise positions of the upper and lower surfaces of each cross-section (n_sections x n_positions)
+        """
+        if x_c is None:
+            x_c = 0.5 * (1 - np.cos(np.linspace(0., np.pi, n_points)))
+        x_c = np.asarray(x_c, dtype=float).reshape(-1)
+        n_sec = len(self)
+        offsets = self.offsets
+        n_pts = np.diff(offsets)
+        x = self.__xz_c[:offsets[-1], 0]
+        z = self.__xz_c[:offsets[-1], 1]
+        cp = self.__cp[:offsets[-1], 0]
+        sec = np.repeat(np.arange(n_sec), n_pts)
+        # Get the leading and trailing edges and the position of each point along the loop starting at the leading edge
+        nonempty = n_pts > 0
+        ile = np.zeros(n_sec, dtype=np.int64)
+        ite = np.zeros(n_sec, dtype=np.int64)
+        ile[nonempty] = np.lexsort((x, sec))[offsets[:-1][nonempty]] - offsets[:-1][nonempty]
+        ite[nonempty] = np.lexsort((-x, sec))[offsets[:-1][nonempty]] - offsets[:-1][nonempty]
+        rank = (np.arange(len(x)) - offsets[sec] - ile[sec]) % np.maximum(n_pts[sec], 1)
+        k = ((ite - ile) % np.maximum(n_pts, 1))[sec]
+        # Split each loop into the surface going from the leading edge to the trailing edge, and the surface coming back
+        ids = [np.flatnonzero(rank <= k), np.flatnonzero((rank >= k) | (rank == 0))]
+        mean_z = [np.bincount(sec[i], z[i], minlength=n_sec) / np.maximum(np.bincount(sec[i], minlength=n_sec), 1) for i in ids]
+        lower = [mean_z[0] < mean_z[1], mean_z[1] <= mean_z[0]]
+        path = np.concatenate([2 * sec[i] + lower[j][sec[i]] for j, i in enumerate(ids)])
+        px = np.concatenate([x[i] for i in ids])
+        pv = np.concatenate([cp[i] for i in ids])
+        # Interpolate on all the surfaces at once, each surface being sorted by x/c (which lies between 0 and 1)
+        order = np.lexsort((px, path))
+        path, px, pv = path[order], px[order], pv[order]
+        n_path = 2 * n_sec
+        begin = np.searchsorted(path, np.arange(n_path), side='left')
+        end = np.searchsorted(path, np.arange(n_path), side='right')
+        query = (2. * np.arange(n_path)[:, None] + x_c[None, :])
+        j = np.searchsorted(2. * path + px, query, side='right')
+        hi = np.clip(j, begin[:, None], np.maximum(end - 1, begin)[:, None])
+        lo = np.clip(j - 1, begin[:, None], np.maximum(end - 1, begin)[:, None])
+        if len(px) > 0:
+            x0, x1 = px[lo], px[hi]
+            w = np.where(x1 > x0, np.clip((x_c[None, :] - x0) / np.where(x1 > x0, x1 - x0, 1.), 0., 1.), 0.)
+            vals = pv[lo] + w * (pv[hi] - pv[lo])
+        else:
+            vals = np.zeros((n_path, len(x_c)))
+        vals[end == begin, :] = np.nan
+        return x_c, vals[0::2], vals[1::2]
+
+    def __integrate(self, xz_c, cp, offsets):
+        """Integrate the pressure coefficient of several cross-sections in a single batch
+
+        Parameters:
+        xz_c: ndarray
+            x and z-coordinates of the points of all cross-sections normalized by chord
+        cp: ndarray
+            pressure coefficients at the points of all cross-sections
+        offsets: ndarray
+            index of the first point of each cross-section, and total number of points
+
+        Returns:
+        cz, cx, cm: ndarray
+            normal force, axial force and quarter-chord moment coefficients of each cross-section
+        """
+        n_sec = len(offsets) - 1
+        if n_sec == 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        # Get the section of each panel
+        xc = xz_c[:, 0]
+        zc = xz_c[:, 1]
+        sec = np.repeat(np.arange(n_sec), np.diff(offsets))
+        # Discard the panels joining the last point of a section to the first point of the next one
+        valid = sec[:-1] == sec[1:]
+        sec = sec[:-1][valid]
+        # Integrate (trapezoidal rule)
+        dx = (xc[1:] - xc[:-1])[valid]
+        dz = -(zc[1:] - zc[:-1])[valid]
+        cp0, cp1 = cp[:-1][valid], cp[1:][valid]
+        x0, x1 = xc[:-1][valid], xc[1:][valid]
+        z0, z1 = zc[:-1][valid], zc[1:][valid]
+        cz = -np.bincount(sec, 0.5 * dx * (cp1 + cp0), minlength=n_sec)
+        cx = -np.bincount(sec, 0.5 * dz * (cp1 + cp0), minlength=n_sec)
+        cm = -np.bincount(sec, -0.5 * (cp1 * (x1 - 0.25) + cp0 * (x0 - 0.25)) * dx + 0.5 * (cp1 * z1 + cp0 * z0) * dz, minlength=n_sec)
+        return cz, cx, cm
 
     def display(self):
         """Display the results
@@ -141,18 +416,201 @@ class CrossSections:
         fig.tight_layout()  # otherwise the right y-label is slightly clipped
         plt.show()
 
-    def write(self):
+    def write(self, binary=False, fname='sections.bin', background=False, dirname='.'):
         """Write to disk
+
+        Parameters:
+        binary: bool
+            whether to write all the sections and loads in a single binary file (True) or one text file per section and a text file for the loads (default: False)
+        fname: str
+            name of binary file (default: sections.bin)
+        background: bool
+            whether to write in a background thread (default: False)
+        dirname: str
+            directory in which the files are written (default: '.', current working directory)
+
+        Returns:
+        future: Future
+            future of the background writing, whose result() waits for the end of the writing and raises its errors, or None if not written in background
         """
-        # Pressure
-        for i in range(len(self.y_sec)):
-            print(f'Writing pressure data file in workspace directory: slice_{i}.dat')
-            hdr = f'y = {self.y_sec[i]}, c = {self.chords[i]}, le = {self.xz_le[i]}\n'
-            hdr += '{:>9s}, {:>10s}, {:>10s}'.format('x/c', 'z/c', 'cp')
-            data = np.hstack((self.xz_c[i], self.cp[i]))
-            np.savetxt(f'slice_{i}.dat', data, fmt='%+1.4e', delimiter=',', header=hdr)
-        # Loads
-        hdr = '{:>9s}, {:>10s}, {:>10s}, {:>10s}'.format('y', 'cl', 'cm', 'cd')
-        data = np.transpose(np.vstack((self.y_sec, self.cl, self.cm, self.cd)))
-        print('Writing loads data file in workspace directory: loads.dat...')
-        np.savetxt('loads.dat', data, fmt='%+1.4e', delimiter=',', header=hdr)
+        if not background:
+            self.__write(binary, fname, dirname)
+            return None
+        # Write a snapshot of the data, so that sections can be added while writing (the used part of the arrays is never modified)
+        snapshot = CrossSections()
+        snapshot._set_arrays(self.__getstate__())
+        executor = ThreadPoolExecutor(1)
+        future = executor.submit(snapshot.__write, binary, fname, dirname)
+        executor.shutdown(wait=False)
+        return future
+
+    def __write(self, binary, fname, dirname):
+        """Write to disk
+
+        Parameters:
+        binary: bool
+            whether to write a single binary file or text files
+        fname: str
+            name of binary file
+        dirname: str
+            directory in which the files are written
+        """
+        with _stage(self.profiler, 'CrossSections.write') as stage:
+            # Sections and loads
+            if binary:
+                path = os.path.normpath(os.path.join(dirname, fname))
+                print(f'Writing sections and loads data file: {path}...')
+                self.__write_binary(path)
+            else:
+                # Pressure
+                for i in range(len(self.y_sec)):
+                    path = os.path.normpath(os.path.join(dirname, f'slice_{i}.dat'))
+                    print(f'Writing pressure data file in workspace directory: {path}')
+                    hdr = f'y = {self.y_sec[i]}, c = {self.chords[i]}, le = {self.xz_le[i]}\n'
+                    hdr += '{:>9s}, {:>10s}, {:>10s}'.format('x/c', 'z/c', 'cp')
+                    data = np.hstack((self.xz_c[i], self.cp[i]))
+                    np.savetxt(path, data, fmt='%+1.4e', delimiter=',', header=hdr)
+                # Loads
+                hdr = '{:>9s}, {:>10s}, {:>10s}, {:>10s}'.format('y', 'cl', 'cm', 'cd')
+                data = np.transpose(np.vstack((self.y_sec, self.cl, self.cm, self.cd)))
+                path = os.path.normpath(os.path.join(dirname, 'loads.dat'))
+                print(f'Writing loads data file in workspace directory: {path}...')
+                np.savetxt(path, data, fmt='%+1.4e', delimiter=',', header=hdr)
+            stage.count(self.offsets[-1], len(self))
+
+    def __write_binary(self, fname):
+        """Write all the sections and loads in a single binary file
+
+        Parameters:
+        fname: str
+            name of binary file
+        """
+        arrays = {name: np.asarray(array, dtype=np.int64 if name == 'offsets' else float) for name, array in self.__getstate__().items()}
+        # Build the index of the arrays, aligned on 64 bytes from the beginning of the data
+        index = {}
+        offset = 0
+        for name, array in arrays.items():
+            index[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+            offset += -(-array.nbytes // 64) * 64
+        header = json.dumps({'version': CrossSectionsFile.VERSION, 'arrays': index}).encode()
+        header += b' ' * (-(len(CrossSectionsFile.MAGIC) + 8 + len(header)) % 64)
+        with open(fname, 'wb') as f:
+            f.write(CrossSectionsFile.MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for array in arrays.values():
+                f.write(np.ascontiguousarray(array).tobytes())
+                f.write(b'\0' * (-array.nbytes % 64))
+
+class _Sections:
+    """Sequence of the data of each cross-section, as views on a flat array
+
+    Parameters:
+    data: ndarray
+        data at the points of all cross-sections
+    offsets: ndarray
+        index of the first point of each cross-section, and total number of points
+    """
+    __slots__ = ('data', 'offsets')
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('cross-section index out of range')
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def _trapezoid(f, x):
+    """Integrate sampled values using the trapezoidal rule
+
+    Parameters:
+    f: ndarray
+        values
+    x: ndarray
+        sorted coordinates of the values
+    """
+    return float(np.sum(0.5 * (f[1:] + f[:-1]) * np.diff(x)))
+
+class CrossSectionsFile:
+    """Read cross-sectional data and loads from a binary file written by CrossSections.write, mapping the data lazily
+
+    Parameters:
+    fname: str
+        name of binary file
+
+    Attributes:
+    y_sec: ndarray
+        y-coordinate of cross-sections
+    chords: ndarray
+        chord length of cross-sections
+    xz_le: ndarray
+        x and z-coordinates of cross-sections leading edge
+    offsets: ndarray
+        index of the first point of each cross-section, and total number of points
+    cl: ndarray
+        spanwise lift distribution
+    cm: ndarray
+        spanwise moment distribution
+    cd: ndarray
+        spanwise drag distribution
+    """
+    MAGIC = b'PYCFDCS\0'
+    VERSION = 1
+
+    def __init__(self, fname):
+        with open(fname, 'rb') as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise RuntimeError(f'File {fname} is not a cross-sections binary file!\n')
+            size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(size))
+        if header['version'] != self.VERSION:
+            raise RuntimeError(f'Version {header["version"]} of file {fname} is not supported!\n')
+        start = len(self.MAGIC) + 8 + size
+        self.__arrays = {}
+        for name, a in header['arrays'].items():
+            if np.prod(a['shape']) == 0:
+                self.__arrays[name] = np.zeros(a['shape'], dtype=np.dtype(a['dtype']))
+            else:
+                self.__arrays[name] = np.memmap(fname, dtype=np.dtype(a['dtype']), mode='r', offset=start + a['offset'], shape=tuple(a['shape']))
+        for name in ['y_sec', 'chords', 'xz_le', 'offsets', 'cl', 'cm', 'cd']:
+            setattr(self, name, self.__arrays[name])
+
+    def __len__(self):
+        return len(self.y_sec)
+
+    def get_section(self, i):
+        """Get the data of a cross-section, without reading the other ones
+
+        Parameters:
+        i: int
+            index of cross-section
+
+        Returns:
+        xz_c, cp: ndarray, ndarray
+            x and z-coordinates normalized by chord and pressure coefficients along the chord of cross-section
+        """
+        begin, end = self.offsets[i], self.offsets[i + 1]
+        return self.__arrays['xz_c'][begin:end], self.__arrays['cp'][begin:end]
+
+    def load(self):
+        """Get all the data, without reading them
+
+        Returns:
+        loads: CrossSections
+            cross-sectional data and loads, backed by the memory-mapped arrays until sections are added
+        """
+        loads = CrossSections()
+        loads._set_arrays(self.__arrays)
+        return loads
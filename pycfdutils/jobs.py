@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import time
+from .vtk_utils import Reader, Cutter
+from .cross_sections import CrossSections
+from .profiling import Profiler
+
+__all__ = ['JobRunner']
+
+class JobRunner:
+    """Compute the sectional loads of several cases described in a job file, using a pool of processes
+
+    The job file is a JSON file containing the default inputs of the cases ("Defaults") and the list of cases ("Cases").
+    The inputs of a case are:
+        "Name": name of the case and of its output directory (default: name of the file without extension)
+        "File": file containing the flow solution, relative to the job file
+        "Cuts": y-coordinates of the slices
+        "Tag": tag name and number if the solution is provided not only on the wing surface (default: [null, null])
+        "Variable": name of variable to extract
+        "AoA": angle of attack in degrees (default: 0.)
+        "Blocks": indices or names of the blocks (Tecplot zones) to load (default: null)
+        "Binary": whether to write the results in a single binary file (default: false)
+    Each case is written in its own directory, with the log of its processing. A case is skipped if its outputs are newer
+    than its file and were computed with the same inputs.
+
+    Parameters:
+    fname: str
+        name of job file
+    output: str
+        directory containing the output directory of each case (default: 'workspace')
+    n_workers: int
+        number of processes (default: None, number of CPUs)
+
+    Attributes:
+    cases: list of dict
+        inputs of each case, with the file given by its absolute path and the output directory
+    results: list of dict
+        name, status ('done', 'skipped' or 'failed'), wall time (s), record of each stage (see Profiler.stages) and error of each case, for the last run
+    n_workers: int
+        number of processes
+    """
+    STAMP = 'case.json' # name of the file recording the inputs and outputs of a case once computed
+    STAGES = [('read', 'Reader.open'), ('cut', 'Cutter.cut_many'), ('extract', 'Cutter.extract'), ('loads', 'CrossSections.compute_loads'), ('write', 'CrossSections.write')]
+
+    def __init__(self, fname, output='workspace', n_workers=None):
+        self.cases = self.__parse(fname, output)
+        self.results = []
+        self.n_workers = n_workers if n_workers else os.cpu_count()
+
+    def __parse(self, fname, output):
+        """Read the job file and fill the inputs of each case
+
+        Parameters:
+        fname: str
+            name of job file
+        output: str
+            directory containing the output directory of each case
+        """
+        if not os.path.isfile(fname):
+            raise RuntimeError(f'File {fname} not found!\n')
+        with open(fname) as f:
+            job = json.load(f)
+        defaults = {'Tag': [None, None], 'AoA': 0., 'Blocks': None, 'Binary': False}
+        defaults.update(job.get('Defaults', {}))
+        cases = []
+        for i, _case in enumerate(job.get('Cases', [])):
+            case = {**defaults, **_case}
+            for key in ['File', 'Cuts', 'Variable']:
+                if key not in case:
+                    raise RuntimeError(f'Input {key} of case {i} not found in job file {fname}!\n')
+            case['File'] = os.path.abspath(os.path.join(os.path.dirname(fname), case['File']))
+            case.setdefault('Name', os.path.splitext(os.path.basename(case['File']))[0])
+            if case['Name'] in [c['Name'] for c in cases]:
+                raise RuntimeError(f'Case {case["Name"]} defined several times in job file {fname}!\n')
+            case['Output'] = os.path.join(output, case['Name'])
+            cases.append(case)
+        return cases
+
+    def run(self, force=False):
+        """Run the cases that are not up to date
+
+        Parameters:
+        force: bool
+            whether to run all the cases, even those that are up to date (default: False)
+
+        Returns:
+        results: list of dict
+            name, status, wall time, record of each stage and error of each case, in the order of the job file
+        """
+        results = {}
+        todo = []
+        for case in self.cases:
+            if not force and _is_up_to_date(case, self.STAMP):
+                results[case['Name']] = {'name': case['Name'], 'status': 'skipped', 'time': 0., 'stages': {}, 'error': None}
+                print(f'{case["Name"]}: skipped (up to date)')
+            else:
+                todo.append(case)
+        # Run the cases, the results are printed as the cases end
+        n_workers = max(1, min(self.n_workers, len(todo)))
+        with mp.Pool(n_workers) if n_workers > 1 else contextlib.nullcontext() as pool:
+            for result in (pool.imap_unordered(_run_case, todo) if pool else map(_run_case, todo)):
+                results[result['name']] = result
+                print(f'{result["name"]}: {result["status"]} in {result["time"]:.3f} s' + (f' ({result["error"].strip()})' if result['error'] else ''))
+        self.results = [results[case['Name']] for case in self.cases]
+        return self.results
+
+    def summary(self):
+        """Get a report of the last run
+
+        Returns:
+        report: str
+            table of status, wall time of the main stages and total wall time of each case
+        """
+        width = max([len(r['name']) for r in self.results] + [4])
+        lines = ['{:<{w}s} {:>8s}'.format('case', 'status', w=width) + ''.join(f' {name + " (s)":>12s}' for name, _ in self.STAGES) + f' {"total (s)":>12s}']
+        for r in self.results:
+            line = f'{r["name"]:<{width}s} {r["status"]:>8s}'
+            for _, stage in self.STAGES:
+                line += f' {r["stages"][stage]["time"]:12.6f}' if stage in r['stages'] else f' {"-":>12s}'
+            line += f' {r["time"]:12.6f}' if r['status'] != 'skipped' else f' {"-":>12s}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def display(self):
+        """Display the report on console
+        """
+        print(self.summary())
+
+def _inputs(case):
+    """Get the inputs of a case that determine its outputs
+
+    Parameters:
+    case: dict
+        inputs of the case
+    """
+    return {key: case[key] for key in ['File', 'Cuts', 'Tag', 'Variable', 'AoA', 'Blocks', 'Binary']}
+
+def _is_up_to_date(case, stamp):
+    """Check whether the outputs of a case exist, are newer than its file and were computed with the same inputs
+
+    Parameters:
+    case: dict
+        inputs of the case
+    stamp: str
+        name of the file recording the inputs and outputs of the case
+    """
+    fname = os.path.join(case['Output'], stamp)
+    if not os.path.isfile(fname) or not os.path.isfile(case['File']):
+        return False
+    try:
+        with open(fname) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if record.get('Inputs') != json.loads(json.dumps(_inputs(case))):
+        return False
+    if os.path.getmtime(fname) < os.path.getmtime(case['File']):
+        return False
+    return all(os.path.isfile(os.path.join(case['Output'], name)) for name in record.get('Outputs', []))
+
+def _run_case(case):
+    """Compute and write the sectional loads of a case, in its output directory
+
+    Parameters:
+    case: dict
+        inputs of the case
+
+    Returns:
+    result: dict
+        name, status ('done' or 'failed'), wall time (s), record of each stage and error of the case
+    """
+    profiler = Profiler()
+    error = None
+    tic = time.perf_counter()
+    try:
+        os.makedirs(case['Output'], exist_ok=True)
+        stamp = os.path.join(case['Output'], JobRunner.STAMP)
+        if os.path.isfile(stamp):
+            os.remove(stamp)
+        with open(os.path.join(case['Output'], 'log.txt'), 'w') as log, contextlib.redirect_stdout(log):
+            tag_name, tag_id = case['Tag']
+            # Read the solution
+            reader = Reader(profiler=profiler)
+            reader.open(case['File'], [case['Variable'], tag_name] if tag_name else [case['Variable']], case['Blocks'])
+            # Create slices
+            cutter = Cutter(reader.grid, profiler=profiler)
+            loads = CrossSections(profiler=profiler)
+            cutter.cut_many([[0., y, 0.] for y in case['Cuts']], [0., 1., 0.], tag_name, tag_id)
+            for i, y in enumerate(case['Cuts']):
+                pts, _, vals = cutter.extract([case['Variable']], 2, slice_id=i)
+                if pts.shape[0] == 0:
+                    raise RuntimeError(f'Cutplane at y = {y} does not cross the grid!\n')
+                loads.add_section(y, pts[:, [0, 2]], vals[case['Variable']])
+            # Compute and write the loads
+            loads.compute_loads(case['AoA'])
+            loads.display()
+            loads.write(case['Binary'], dirname=case['Output'])
+        # Record the inputs and outputs once the case is computed
+        outputs = ['sections.bin'] if case['Binary'] else [f'slice_{i}.dat' for i in range(len(case['Cuts']))] + ['loads.dat']
+        with open(stamp, 'w') as f:
+            json.dump({'Inputs': _inputs(case), 'Outputs': outputs}, f, indent=2)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return {'name': case['Name'], 'status': 'failed' if error else 'done', 'time': time.perf_counter() - tic, 'stages': dict(profiler.stages), 'error': error}
+
+def main():
+    """Run the cases of a job file from the command line
+    """
+    import argparse, sys
+    parser = argparse.ArgumentParser(description='Compute the sectional loads of the cases described in a job file')
+    parser.add_argument('file', help='job file (JSON)')
+    parser.add_argument('-o', '--output', default='workspace', help='directory containing the output directory of each case (default: workspace)')
+    parser.add_argument('-n', '--n-workers', type=int, help='number of processes (default: number of CPUs)')
+    parser.add_argument('-f', '--force', action='store_true', help='run all the cases, even those that are up to date')
+    args = parser.parse_args()
+    runner = JobRunner(args.file, args.output, args.n_workers)
+    runner.run(args.force)
+    runner.display()
+    if any(r['status'] == 'failed' for r in runner.results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
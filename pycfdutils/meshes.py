@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Synthetic wing meshes with an analytic pressure coefficient, used by the tests and the benchmarks
+
+import numpy as np
+from ._vtk import vtk, vtk_to_numpy, numpy_to_vtk, numpy_to_vtkIdTypeArray
+
+__all__ = ['wing', 'pressure', 'surface', 'volume', 'grid_points', 'write']
+
+def wing(n_chord, n_span, span=1.):
+    """Compute the points of a swept and tapered wing with NACA 0012 sections
+
+    Parameters:
+    n_chord: int
+        number of points along the upper (or lower) side of each section
+    n_span: int
+        number of sections
+    span: float
+        span of the wing (default: 1.)
+
+    Returns:
+    pts: ndarray
+        points coordinates, of shape (n_span, 2 * n_chord - 2, 3), going from the trailing edge to the leading edge along the upper side
+    """
+    x = 0.5 * (1 - np.cos(np.linspace(0, np.pi, n_chord)))
+    z = 0.6 * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x**2 + 0.2843 * x**3 - 0.1036 * x**4)
+    xs = np.concatenate((x[::-1], x[1:-1]))
+    zs = np.concatenate((z[::-1], -z[1:-1]))
+    y = np.linspace(0., span, n_span)
+    chord = 1 - 0.4 * y / span
+    pts = np.empty((n_span, len(xs), 3))
+    pts[:, :, 0] = 0.3 * y[:, None] + chord[:, None] * xs[None, :]
+    pts[:, :, 1] = y[:, None]
+    pts[:, :, 2] = chord[:, None] * zs[None, :]
+    return pts
+
+def pressure(pts, span=1.):
+    """Compute an analytic pressure coefficient, with suction on the upper side decreasing toward the tip
+
+    Parameters:
+    pts: ndarray
+        points coordinates
+    span: float
+        span of the wing (default: 1.)
+    """
+    le = 0.3 * pts[:, 1] # leading edge
+    chord = 1 - 0.4 * pts[:, 1] / span
+    xc = np.clip((pts[:, 0] - le) / chord, 0., 1.)
+    load = np.sqrt(np.clip(1 - (pts[:, 1] / (1.01 * span))**2, 0., 1.))
+    return 1 - 4 * xc * (1 - xc) - 0.8 * load * np.sign(pts[:, 2]) * np.sqrt(1 - xc) * np.exp(-10 * xc)
+
+def surface(n_cells, span=1.):
+    """Create a triangulated wing surface with about n_cells cells, a pressure coefficient Cp and a tag (5)
+
+    Parameters:
+    n_cells: int
+        approximate number of cells
+    span: float
+        span of the wing (default: 1.)
+
+    Returns:
+    grid: vtkUnstructuredGrid
+        surface grid
+    """
+    # Choose twice as many points along the section than along the span
+    n_span = max(2, int(round(np.sqrt(n_cells / 4))) + 1)
+    n_chord = max(3, int(round(n_cells / (4 * (n_span - 1)))) + 1)
+    pts = wing(n_chord, n_span, span)
+    n_sec = pts.shape[1]
+    # Connect each quad (i, j), (i+1, j), (i+1, j+1), (i, j+1) with two triangles, whose normals point out of the wing
+    i, j = np.meshgrid(np.arange(n_span - 1), np.arange(n_sec), indexing='ij')
+    a = (i * n_sec + j).ravel()
+    b = (i * n_sec + (j + 1) % n_sec).ravel()
+    c = b + n_sec
+    d = a + n_sec
+    cells = np.column_stack((a, d, c, a, c, b)).reshape(-1, 3)
+    grid = _build(pts.reshape(-1, 3), cells, vtk.VTK_TRIANGLE)
+    _add_data(grid, pressure(grid_points(grid), span), np.full(len(cells), 5, dtype=np.int32))
+    return grid
+
+def volume(n_cells, span=1., thickness=0.5):
+    """Create a hexahedral mesh of a layer surrounding the wing with about n_cells cells, a pressure coefficient Cp and a tag (5 next to the wing and 1 elsewhere)
+
+    Parameters:
+    n_cells: int
+        approximate number of cells
+    span: float
+        span of the wing (default: 1.)
+    thickness: float
+        thickness of the layer (default: 0.5)
+
+    Returns:
+    grid: vtkUnstructuredGrid
+        volume grid
+    """
+    # Choose twice as many points along the section than along the span and the normal
+    n_span = max(2, int(round((n_cells / 2)**(1 / 3))) + 1)
+    n_layer = n_span
+    n_chord = max(3, int(round(n_cells / (2 * (n_span - 1) * (n_layer - 1)))) + 1)
+    surf = wing(n_chord, n_span, span)
+    n_sec = surf.shape[1]
+    # Offset the sections along the direction from their center
+    center = np.mean(surf, axis=1, keepdims=True)
+    direction = surf - center
+    direction /= np.linalg.norm(direction, axis=2, keepdims=True)
+    h = thickness * np.linspace(0., 1., n_layer)**2
+    pts = surf[None, :, :, :] + h[:, None, None, None] * direction[None, :, :, :]
+    # Connect the hexahedra, with their bottom face on the side of the wing
+    k, i, j = np.meshgrid(np.arange(n_layer - 1), np.arange(n_span - 1), np.arange(n_sec), indexing='ij')
+    a = (k * n_span * n_sec + i * n_sec + j).ravel()
+    b = (k * n_span * n_sec + i * n_sec + (j + 1) % n_sec).ravel()
+    c = b + n_sec
+    d = a + n_sec
+    layer = n_span * n_sec
+    cells = np.column_stack((a, d, c, b, a + layer, d + layer, c + layer, b + layer))
+    grid = _build(pts.reshape(-1, 3), cells, vtk.VTK_HEXAHEDRON)
+    tag = np.where(k.ravel() == 0, 5, 1).astype(np.int32)
+    _add_data(grid, pressure(grid_points(grid), span) * np.exp(-np.repeat(h / thickness, layer)), tag)
+    return grid
+
+def grid_points(grid):
+    """Get the points coordinates of a grid
+    """
+    return vtk_to_numpy(grid.GetPoints().GetData())
+
+def write(grid, fname):
+    """Write a grid to a VTK (.vtk, .vtu) or Tecplot ASCII (.dat) file
+
+    Parameters:
+    grid: vtkUnstructuredGrid
+        grid to write
+    fname: str
+        name of file
+    """
+    if fname.endswith('.dat'):
+        _write_tecplot(grid, fname)
+        return
+    writer = vtk.vtkXMLUnstructuredGridWriter() if fname.endswith('.vtu') else vtk.vtkUnstructuredGridWriter()
+    if fname.endswith('.vtk'):
+        writer.SetFileTypeToBinary()
+    writer.SetFileName(fname)
+    writer.SetInputData(grid)
+    writer.Write()
+
+def _build(pts, cells, cell_type):
+    """Build an unstructured grid made of one type of cell
+    """
+    grid = vtk.vtkUnstructuredGrid()
+    points = vtk.vtkPoints()
+    points.SetData(numpy_to_vtk(pts, deep=1))
+    grid.SetPoints(points)
+    offsets = np.arange(0, cells.size + 1, cells.shape[1], dtype=np.int64)
+    array = vtk.vtkCellArray()
+    array.SetData(numpy_to_vtkIdTypeArray(offsets, deep=1), numpy_to_vtkIdTypeArray(cells.ravel().astype(np.int64), deep=1))
+    grid.SetCells(cell_type, array)
+    return grid
+
+def _add_data(grid, cp, tag):
+    """Add the pressure coefficient at points and the tag at cells
+    """
+    vals = numpy_to_vtk(cp, deep=1)
+    vals.SetName('Cp')
+    grid.GetPointData().AddArray(vals)
+    vals = numpy_to_vtk(tag, deep=1)
+    vals.SetName('tag')
+    grid.GetCellData().AddArray(vals)
+
+def _write_tecplot(grid, fname):
+    """Write a grid to a Tecplot ASCII file, as one finite-element zone with data at points and tag at cells
+    """
+    pts = grid_points(grid)
+    cp = vtk_to_numpy(grid.GetPointData().GetArray('Cp'))
+    tag = vtk_to_numpy(grid.GetCellData().GetArray('tag'))
+    cells = vtk_to_numpy(grid.GetCells().GetConnectivityArray()).reshape(len(tag), -1)
+    ztype = {3: 'FETRIANGLE', 8: 'FEBRICK'}[cells.shape[1]]
+    with open(fname, 'w') as f:
+        f.write('TITLE = "wing"\n')
+        f.write('VARIABLES = "x", "y", "z", "Cp", "tag"\n')
+        f.write(f'ZONE T="wing", NODES={len(pts)}, ELEMENTS={len(cells)}, DATAPACKING=BLOCK, ZONETYPE={ztype}, VARLOCATION=([5]=CELLCENTERED)\n')
+        for vals in (pts[:, 0], pts[:, 1], pts[:, 2], cp, tag):
+            np.savetxt(f, vals.reshape(-1, 1), fmt='%.10e' if vals.dtype.kind == 'f' else '%d')
+        np.savetxt(f, cells + 1, fmt='%d')
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import os
+import queue
+import threading
+from .vtk_utils import Reader, Cutter, _grid_to_numpy, _numpy_to_grid, _is_partitioned
+from .slicing import NumpyCutter
+from .cross_sections import CrossSections
+
+__all__ = ['SpanwiseSlicer', 'BatchSlicer']
+
+class SpanwiseSlicer:
+    """Slice a grid at several spanwise stations using a pool of processes
+
+    The grid is placed in shared memory once, and each process cuts a contiguous block of stations. With the numpy backend,
+    the processes do not load VTK, and only the triangles and quadrilaterals of the grid are cut. The pieces of partitioned
+    and multiblock grids are instead cut by the processes of the Cutter, with the vtk backend.
+
+    Parameters:
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
+    n_workers: int
+        number of processes (default: None, number of CPUs)
+    backend: str
+        cutter used to slice the grid, 'vtk' (Cutter) or 'numpy' (NumpyCutter) (default: 'vtk')
+
+    Attributes:
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
+    n_workers: int
+        number of processes
+    backend: str
+        cutter used to slice the grid
+    """
+    def __init__(self, grid, n_workers=None, backend='vtk'):
+        if backend not in _CUTTERS:
+            raise RuntimeError(f'Backend {backend} not implemented!\n')
+        self.grid = grid
+        self.n_workers = n_workers if n_workers else os.cpu_count()
+        self.backend = backend
+
+    def slice(self, y_secs, var_name, tag_name=None, tag_id=None):
+        """Extract the cross-sections at several spanwise stations
+
+        Parameters:
+        y_secs: array
+            y-coordinates of the cross-sections
+        var_name: str
+            name of pressure coefficient variable
+        tag_name: str
+            name of variable to create threshold on (default: None)
+        tag_id: int
+            ID number to threshold (default: None)
+
+        Returns:
+        loads: CrossSections
+            cross-sectional data, in the same order as y_secs
+        """
+        y_secs = [float(y) for y in y_secs]
+        n_workers = max(1, min(self.n_workers, len(y_secs)))
+        # Slice the pieces of a partitioned or multiblock grid in parallel
+        if _is_partitioned(self.grid):
+            sections = _slice(Cutter(self.grid, n_workers=self.n_workers), y_secs, var_name, tag_name, tag_id)
+        # Slice serially
+        elif n_workers == 1:
+            sections = _slice(_CUTTERS[self.backend](self.grid), y_secs, var_name, tag_name, tag_id)
+        # Slice in parallel, using shared memory to send the grid to the processes
+        else:
+            shms = []
+            try:
+                specs = {}
+                for name, array in _grid_to_numpy(self.grid, [var_name, tag_name] if tag_name else [var_name]).items():
+                    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                    shms.append(shm)
+                    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                    specs[name] = (shm.name, array.shape, array.dtype.str)
+                chunks = [list(c) for c in np.array_split(y_secs, n_workers)]
+                with mp.Pool(n_workers, initializer=_init_worker, initargs=(specs, self.backend)) as pool:
+                    results = pool.starmap(_slice_worker, [(c, var_name, tag_name, tag_id) for c in chunks])
+            finally:
+                for shm in shms:
+                    shm.close()
+                    shm.unlink()
+            sections = [s for r in results for s in r]
+        # Gather the cross-sections
+        loads = CrossSections()
+        for y, xz, cp in sections:
+            loads.add_section(y, xz, cp)
+        return loads
+
+class BatchSlicer:
+    """Slice several solution files at the same spanwise stations, reading the next files in background
+
+    A background thread reads the files in order while the main thread cuts and integrates the grids already read. The
+    number of grids held in memory is bounded by the number of in-flight grids.
+
+    Parameters:
+    y_secs: array
+        y-coordinates of the cross-sections
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on (default: None)
+    tag_id: int
+        ID number to threshold (default: None)
+    blocks: array
+        indices or names of blocks to load (default: None)
+    in_flight: int
+        maximum number of grids being read or sliced at the same time (default: 2)
+    n_workers: int
+        number of processes used to slice each grid (default: 1)
+    cache: GridCache
+        on-disk cache of grids (default: None)
+
+    Attributes:
+    y_secs: array
+        y-coordinates of the cross-sections
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on
+    tag_id: int
+        ID number to threshold
+    blocks: array
+        indices or names of blocks to load
+    in_flight: int
+        maximum number of grids being read or sliced at the same time
+    n_workers: int
+        number of processes used to slice each grid
+    cache: GridCache
+        on-disk cache of grids
+    """
+    def __init__(self, y_secs, var_name, tag_name=None, tag_id=None, blocks=None, in_flight=2, n_workers=1, cache=None):
+        self.y_secs = [float(y) for y in y_secs]
+        self.var_name = var_name
+        self.tag_name = tag_name
+        self.tag_id = tag_id
+        self.blocks = blocks
+        self.in_flight = max(1, in_flight)
+        self.n_workers = n_workers
+        self.cache = cache
+
+    def run(self, fnames, aoa=0):
+        """Slice the files and compute the sectional loads
+
+        Parameters:
+        fnames: array
+            names of grid files
+        aoa: float or array
+            angle of attack in degrees, common to all the files or given for each file (default: 0)
+
+        Returns:
+        loads: generator
+            cross-sectional data and loads of each file (CrossSections), in the order of fnames
+        """
+        fnames = list(fnames)
+        aoas = np.broadcast_to(np.asarray(aoa, dtype=float), (len(fnames),))
+        grids = queue.Queue()
+        slots = threading.Semaphore(self.in_flight)
+        stop = threading.Event()
+        thread = threading.Thread(target=self.__read, args=(fnames, grids, slots, stop), daemon=True)
+        thread.start()
+        try:
+            for i in range(len(fnames)):
+                grid, error = grids.get()
+                if error is not None:
+                    raise error
+                loads = SpanwiseSlicer(grid, self.n_workers).slice(self.y_secs, self.var_name, self.tag_name, self.tag_id)
+                del grid
+                slots.release() # the grid is not needed anymore, let the next one be read
+                loads.compute_loads(aoas[i])
+                yield loads
+        finally:
+            stop.set()
+            slots.release() # wake up the reader if it is waiting for a slot
+            thread.join()
+
+    def __read(self, fnames, grids, slots, stop):
+        """Read the files in order, waiting for a free slot before reading each file
+
+        Parameters:
+        fnames: array
+            names of grid files
+        grids: Queue
+            queue of (grid, error) read
+        slots: Semaphore
+            number of grids that can still be read
+        stop: Event
+            flag set when the reading must stop
+        """
+        arrays = [self.var_name, self.tag_name] if self.tag_name else [self.var_name]
+        for fname in fnames:
+            slots.acquire()
+            if stop.is_set():
+                return
+            try:
+                reader = Reader(self.cache)
+                reader.open(fname, arrays, self.blocks)
+                grids.put((reader.grid, None))
+                del reader
+            except Exception as e:
+                grids.put((None, e))
+                return
+
+def _slice(cutter, y_secs, var_name, tag_name, tag_id):
+    """Cut a grid at several spanwise stations and extract the cross-sectional data
+
+    Parameters:
+    cutter: Cutter or NumpyCutter
+        cutter of the grid
+    y_secs: array
+        y-coordinates of the cross-sections
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on
+    tag_id: int
+        ID number to threshold
+    """
+    cutter.cut_many([[0., y, 0.] for y in y_secs], [0., 1., 0.], tag_name, tag_id)
+    sections = []
+    for i, y in enumerate(y_secs):
+        pts, _, vals = cutter.extract([var_name], 2, slice_id=i)
+        sections.append((y, pts[:, [0, 2]], vals[var_name]))
+    return sections
+
+# Cutter of each backend
+_CUTTERS = {'vtk': Cutter, 'numpy': NumpyCutter}
+
+# Process-local state of the workers
+_worker = {}
+
+def _init_worker(specs, backend):
+    """Attach the shared memory and build the cutter in a worker process
+
+    Parameters:
+    specs: dict
+        name-(shared memory name, shape, dtype) dictionnary of grid and data
+    backend: str
+        cutter used to slice the grid
+    """
+    _worker['shms'] = [shared_memory.SharedMemory(name=spec[0]) for spec in specs.values()]
+    arrays = {name: np.ndarray(spec[1], dtype=np.dtype(spec[2]), buffer=shm.buf) for (name, spec), shm in zip(specs.items(), _worker['shms'])}
+    _worker['cutter'] = Cutter(_numpy_to_grid(arrays)) if backend == 'vtk' else NumpyCutter(arrays)
+
+def _slice_worker(y_secs, var_name, tag_name, tag_id):
+    """Slice the grid of a worker process
+
+    Parameters:
+    y_secs: array
+        y-coordinates of the cross-sections
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on
+    tag_id: int
+        ID number to threshold
+    """
+    return _slice(_worker['cutter'], y_secs, var_name, tag_name, tag_id)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import time
+
+__all__ = ['Profiler', 'Stage']
+
+class Profiler:
+    """Record the wall time, number of calls, number of points and cells, and peak memory of each stage of the processing
+
+    The profiler is passed to Reader, Cutter and CrossSections. Stages can be nested, in which case the time of a stage
+    includes the time of its inner stages. The profiler is not thread-safe.
+
+    Parameters:
+    memory: bool
+        whether to record the peak resident memory of the process during each stage (default: False)
+    callback: callable
+        function called at the end of each call to a stage, as callback(name, time, points, cells, memory) (default: None)
+
+    Attributes:
+    stages: OrderedDict
+        name-record dictionnary of stages, where each record is a dictionnary of number of calls, total wall time (s),
+        total number of points and cells, and peak memory (bytes, or None if not recorded)
+    memory: bool
+        whether to record the peak resident memory of the process during each stage
+    callback: callable
+        function called at the end of each call to a stage
+    """
+    def __init__(self, memory=False, callback=None):
+        self.stages = OrderedDict()
+        self.memory = memory
+        self.callback = callback
+        self.__stack = []
+
+    def reset(self):
+        """Remove all the records
+        """
+        self.stages.clear()
+
+    @contextmanager
+    def stage(self, name):
+        """Record a stage
+
+        Parameters:
+        name: str
+            name of stage
+
+        Returns:
+        stage: Stage
+            object used to count the points and cells processed by the stage
+        """
+        stage = Stage()
+        if self.memory:
+            self.__update_peak(stage)
+            _reset_peak_memory()
+        self.__stack.append(stage)
+        tic = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            elapsed = time.perf_counter() - tic
+            self.__stack.pop()
+            if self.memory:
+                self.__update_peak(stage)
+            record = self.stages.setdefault(name, {'calls': 0, 'time': 0., 'points': 0, 'cells': 0, 'memory': None})
+            record['calls'] += 1
+            record['time'] += elapsed
+            record['points'] += stage.points
+            record['cells'] += stage.cells
+            if self.memory:
+                record['memory'] = max(record['memory'] or 0, stage.peak)
+            if self.callback is not None:
+                self.callback(name, elapsed, stage.points, stage.cells, stage.peak if self.memory else None)
+
+    def summary(self):
+        """Get a report of the stages, in the order they were first called
+
+        Returns:
+        report: str
+            table of number of calls, total and mean wall time, number of points and cells, and peak memory of each stage
+        """
+        width = max([len(name) for name in self.stages] + [5])
+        lines = ['{:<{w}s} {:>8s} {:>12s} {:>12s} {:>12s} {:>12s} {:>12s}'.format('stage', 'calls', 'time (s)', 'mean (s)', 'points', 'cells', 'peak (MiB)', w=width)]
+        for name, r in self.stages.items():
+            memory = f'{r["memory"] / 2**20:12.1f}' if r['memory'] is not None else f'{"-":>12s}'
+            lines.append(f'{name:<{width}s} {r["calls"]:8d} {r["time"]:12.6f} {r["time"] / r["calls"]:12.6f} {r["points"]:12d} {r["cells"]:12d} {memory}')
+        return '\n'.join(lines)
+
+    def display(self):
+        """Display the report on console
+        """
+        print(self.summary())
+
+    def __update_peak(self, stage):
+        """Update the peak memory of a stage and of the stages containing it, before the peak is reset or when the stage ends
+
+        Parameters:
+        stage: Stage
+            stage being entered or exited
+        """
+        peak = _peak_memory()
+        for s in self.__stack + [stage]:
+            s.peak = max(s.peak, peak)
+
+class Stage:
+    """Counters of a stage being recorded
+
+    Attributes:
+    points: int
+        number of points processed
+    cells: int
+        number of cells processed
+    peak: int
+        peak memory (bytes)
+    """
+    __slots__ = ('points', 'cells', 'peak')
+    def __init__(self):
+        self.points = 0
+        self.cells = 0
+        self.peak = 0
+
+    def count(self, points=0, cells=0):
+        """Count processed points and cells
+
+        Parameters:
+        points: int
+            number of points (default: 0)
+        cells: int
+            number of cells (default: 0)
+        """
+        self.points += int(points)
+        self.cells += int(cells)
+
+class _NullStage:
+    """Stage doing nothing, used when no profiler is given
+    """
+    __slots__ = ()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def count(self, points=0, cells=0):
+        pass
+
+_null_stage = _NullStage()
+
+def _stage(profiler, name):
+    """Record a stage with a profiler, or do nothing if the profiler is None
+
+    Parameters:
+    profiler: Profiler
+        profiler, or None
+    name: str
+        name of stage
+    """
+    if profiler is None:
+        return _null_stage
+    return profiler.stage(name)
+
+def _peak_memory():
+    """Get the peak resident memory of the process (bytes)
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource, sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _reset_peak_memory():
+    """Reset the peak resident memory of the process to its current value, if possible (Linux only)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
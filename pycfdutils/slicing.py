@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from .profiling import _stage
+
+__all__ = ['NumpyCutter', 'CutStencil']
+
+class NumpyCutter:
+    """Manage data extraction from cutplanes of a surface grid, using numpy only
+
+    The points of the cutplanes are the intersections of the plane with the edges of the triangles and quadrilaterals of
+    the grid, and the point data are interpolated linearly along the edges. The other cells of the grid are ignored. Since
+    VTK is not needed, the cutter can be used in lightweight processes, and gives the same results as Cutter.
+
+    Parameters:
+    grid: dict or vtkDataObject
+        name-ndarray dictionnary of points, offsets, connectivity, cell types, and point and cell data prefixed by point/ and
+        cell/ (as loaded by GridCache), or object containing grid and data
+    profiler: Profiler
+        profiler recording the stages of the cut and of the extraction (default: None)
+
+    Attributes:
+    data: dict
+        name-ndarray dictionnary of grid and data
+    slice: tuple
+        indices and weights of the ends of the edges containing the points, line connectivity list and cell of each line, of the cutplane
+    slices: list of tuple
+        indices and weights of the ends of the edges containing the points, line connectivity list and cell of each line, of each cutplane created by cut_many
+    loops: list of tuple
+        first and past-the-last indices of the points of each loop or polyline, and whether it is closed, for the last sorted extraction
+    profiler: Profiler
+        profiler recording the stages of the cut and of the extraction
+    """
+    def __init__(self, grid, profiler=None):
+        if not isinstance(grid, dict):
+            from .vtk_utils import _grid_to_numpy
+            grid = _grid_to_numpy(grid)
+        self.data = grid
+        self.slice = None
+        self.slices = []
+        self.loops = []
+        self.profiler = profiler
+        self.__groups = None
+
+    def cut(self, cut_orig, cut_norm, tag_name=None, tag_id=None):
+        """Create a cutplane on the grid or on a subset of it
+
+        Parameters:
+        cut_orig: array
+            coordinates of origin of cutplane
+        cut_norm: array
+            components of vector normal to cutplane
+        tag_name: str
+            name of cell variable to select the cells on (default: None)
+        tag_id: int
+            ID number to select (default: None)
+        """
+        self.cut_many([cut_orig], cut_norm, tag_name, tag_id)
+        self.slice = self.slices[0]
+        self.slices = []
+
+    def cut_many(self, cut_origs, cut_norm, tag_name=None, tag_id=None):
+        """Create several parallel cutplanes on the grid or on a subset of it
+
+        Parameters:
+        cut_origs: array
+            coordinates of origin of each cutplane (n x 3), or signed distance of each cutplane from the global origin along the normal (n)
+        cut_norm: array
+            components of vector normal to cutplanes
+        tag_name: str
+            name of cell variable to select the cells on (default: None)
+        tag_id: int
+            ID number to select (default: None)
+        """
+        norm = np.asarray(cut_norm, dtype=float)
+        norm = norm / np.linalg.norm(norm)
+        origs = np.asarray(cut_origs, dtype=float)
+        dists = origs @ norm if origs.ndim == 2 else origs.reshape(-1)
+        # Get the cells and the distance of the points along the normal, reused while the normal and the tag do not change
+        key = (tag_name, tag_id, tuple(norm))
+        if self.__groups is None or self.__groups[0] != key:
+            self.__groups = (key, *_surface_groups(self.data, norm, tag_name, tag_id))
+        _, groups, dist = self.__groups
+        # Intersect each cutplane
+        with _stage(self.profiler, 'NumpyCutter.cut_many') as stage:
+            self.slices = [_intersect(groups, dist, v, len(dist)) for v in dists]
+            stage.count(sum(len(s[0]) for s in self.slices), sum(len(s[2]) for s in self.slices))
+
+    def extract(self, var_names, tag_dim=2, at_point=True, sort=True, copy=False, slice_id=None):
+        """Extract points, connectivity list and data from cutting plane
+
+        Parameters:
+        var_names: array
+            array of names of data to extract
+        tag_dim: int
+            dimension of cutted entity, only 2 is available (default: 2)
+        at_point: bool
+            whether data are defined at points (True) or at cells (default: True)
+        sort: bool
+            whether data must be sorted or not (default: True)
+        copy: bool
+            unused, the returned arrays are always new (default: False)
+        slice_id: int
+            index of the cutplane created by cut_many to extract from (default: None, extract from the cutplane created by cut)
+        """
+        if tag_dim != 2:
+            raise RuntimeError(f'tag_dim can only be 2 for NumpyCutter but {tag_dim} was given!\n')
+        ids, weights, elems, cells = self.slice if slice_id is None else self.slices[slice_id]
+        with _stage(self.profiler, 'NumpyCutter.extract') as stage:
+            pts = _interpolate(self.data['points'], ids, weights)
+            vals = {}
+            for name in var_names:
+                key = ('point/' if at_point else 'cell/') + name
+                if key not in self.data:
+                    raise RuntimeError(f'Variable {name} not found in cutplane!\n')
+                if at_point:
+                    vals[name] = _interpolate(self.data[key], ids, weights)
+                else:
+                    vals[name] = self.data[key].reshape(len(self.data['types']), -1)[cells]
+            stage.count(pts.shape[0], elems.shape[0])
+        # sort the data
+        if sort:
+            if not at_point:
+                print('Sorting method not implemented for data defined at cell. Skipping sort!\n')
+            else:
+                with _stage(self.profiler, 'NumpyCutter.sort') as stage:
+                    order, elems, self.loops = _order(elems, pts)
+                    pts = pts[order, :]
+                    vals = {name: val[order, :] for name, val in vals.items()}
+                    stage.count(pts.shape[0], elems.shape[0])
+        return pts, elems, vals
+
+class CutStencil:
+    """Interpolation stencils of the sorted points of several cutplanes, created by Cutter.cut_stencil
+
+    Each point of a cutplane is interpolated linearly between the two ends of an edge of the grid, so that the stencils of
+    all the cutplanes are applied to the data of a solution by gathering the values at the ends of the edges, at once for all
+    the components (or solutions) given as columns.
+
+    Parameters:
+    pts: ndarray
+        points coordinates of the grid
+    stencils: list of tuple
+        indices of the ends, weights of the ends, line connectivity list and loops of each cutplane
+
+    Attributes:
+    ids: ndarray
+        indices of the two grid points interpolated to get each point of all the cutplanes (n x 2)
+    weights: ndarray
+        weights of the two grid points of each point of all the cutplanes (n x 2)
+    offsets: ndarray
+        index of the first point of each cutplane, and total number of points
+    elems: list of ndarray
+        line connectivity list of the sorted points of each cutplane
+    loops: list of list of tuple
+        first and past-the-last indices of the points of each loop or polyline, and whether it is closed, for each cutplane
+    points: ndarray
+        coordinates of the points of all the cutplanes
+    n_grid: int
+        number of points of the grid
+    """
+    def __init__(self, pts, stencils):
+        self.ids = np.concatenate([s[0] for s in stencils]).reshape(-1, 2) if stencils else np.zeros((0, 2), dtype=np.int64)
+        self.weights = np.concatenate([s[1] for s in stencils]).reshape(-1, 2) if stencils else np.zeros((0, 2))
+        self.offsets = np.concatenate(([0], np.cumsum([len(s[0]) for s in stencils]))).astype(np.int64)
+        self.elems = [s[2] for s in stencils]
+        self.loops = [s[3] for s in stencils]
+        self.n_grid = len(pts)
+        self.points = self.interpolate(pts)
+
+    def __len__(self):
+        return len(self.elems)
+
+    def interpolate(self, values):
+        """Interpolate data defined at the points of the grid onto the points of all the cutplanes
+
+        Parameters:
+        values: ndarray
+            values at the points of the grid (n_grid or n_grid x n_components), several variables or solutions can be stacked as components
+
+        Returns:
+        values: ndarray
+            values at the points of all the cutplanes (n x n_components)
+        """
+        values = np.asarray(values)
+        if values.shape[0] != self.n_grid:
+            raise RuntimeError(f'data must be defined at the {self.n_grid} points of the grid but {values.shape[0]} values were given!\n')
+        return _interpolate(values, self.ids, self.weights)
+
+    def extract(self, grid, var_names):
+        """Extract points, connectivity list and data of all the cutplanes from a solution on the grid
+
+        Parameters:
+        grid: dict or vtkDataObject
+            name-ndarray dictionnary of grid and data, or object containing grid and data, with the same points as the grid used to create the stencils
+        var_names: array
+            array of names of data at points to extract
+
+        Returns:
+        slices: list of tuple
+            sorted points, connectivity list and name-ndarray dictionnary of values of each cutplane, as given by Cutter.extract
+        """
+        if isinstance(grid, dict):
+            data = grid
+        else:
+            from .vtk_utils import _grid_to_numpy
+            data = _grid_to_numpy(grid, var_names)
+        vals = {}
+        for name in var_names:
+            if 'point/' + name not in data:
+                raise RuntimeError(f'Variable {name} not found in grid!\n')
+            vals[name] = self.interpolate(data['point/' + name])
+        slices = []
+        for i in range(len(self)):
+            begin, end = self.offsets[i], self.offsets[i + 1]
+            slices.append((self.points[begin:end], self.elems[i], {name: val[begin:end] for name, val in vals.items()}))
+        return slices
+
+# VTK type and number of vertices of the surface cells that can be cut
+_SURFACE_CELLS = [(5, 3), (9, 4)] # VTK_TRIANGLE, VTK_QUAD
+
+def _surface_groups(data, norm, tag_name=None, tag_id=None):
+    """Get the triangles and quadrilaterals of a grid, and the distance of its points along a direction
+
+    Parameters:
+    data: dict
+        name-ndarray dictionnary of grid and data
+    norm: ndarray
+        unit vector of the direction
+    tag_name: str
+        name of cell variable to select the cells on (default: None)
+    tag_id: int
+        ID number to select (default: None)
+
+    Returns:
+    groups: list of tuple
+        connectivity, indices, and minimum and maximum distance of the cells of each type
+    dist: ndarray
+        distance of the points of the grid to the origin along the direction
+    """
+    types = data['types']
+    selected = np.ones(len(types), dtype=bool)
+    if tag_name:
+        if 'cell/' + tag_name not in data:
+            raise RuntimeError(f'Cell variable {tag_name} not found in grid!\n')
+        selected = data['cell/' + tag_name].reshape(-1) == tag_id
+    dist = data['points'] @ norm
+    groups = []
+    for ctype, n_v in _SURFACE_CELLS:
+        ids = np.flatnonzero(selected & (types == ctype))
+        conn = data['connectivity'][data['offsets'][ids, None] + np.arange(n_v)]
+        groups.append((conn, ids, dist[conn].min(axis=1), dist[conn].max(axis=1)))
+    return groups, dist
+
+def _intersect(groups, dist, value, n_pts):
+    """Intersect the edges of the cells with a cutplane
+
+    Parameters:
+    groups: list of tuple
+        connectivity, indices, and minimum and maximum distance to the origin of the cells of each type
+    dist: ndarray
+        distance of the points of the grid to the origin along the normal
+    value: float
+        distance of the cutplane to the origin along the normal
+    n_pts: int
+        number of points of the grid
+
+    Returns:
+    ids, weights, elems, cells: ndarray, ndarray, ndarray, ndarray
+        indices of the ends of the edges containing the points, weights of the ends, line connectivity list and cell of each line
+    """
+    keys = [[], []] # edge of the second and first points of each line
+    lo, hi, t, cells = [], [], [], []
+    for conn, cids, cmin, cmax in groups:
+        crossed = (cmin < value) & (cmax >= value)
+        conn, cids = conn[crossed], cids[crossed]
+        n_v = conn.shape[1]
+        d = dist[conn] - value
+        neg = d < 0
+        nxt = np.roll(np.arange(n_v), -1)
+        up = neg & ~neg[:, nxt] # edges entering the positive side
+        down = ~neg & neg[:, nxt] # edges leaving the positive side
+        # Pair each entering edge with the next leaving edge, and orient the lines from the leaving edge as VTK does
+        cell, k = np.nonzero(up)
+        partner = np.full(len(k), -1)
+        for shift in range(n_v - 1, 0, -1):
+            kk = (k + shift) % n_v
+            partner = np.where(down[cell, kk], kk, partner)
+        for j, edge in enumerate([k, partner]):
+            a, b = conn[cell, edge], conn[cell, nxt[edge]]
+            da, db = d[cell, edge], d[cell, nxt[edge]]
+            w = da / (da - db) # weight of b
+            # Orient the edges from their smallest point, and use the point itself if the plane goes through it
+            swap = a > b
+            a, b, w = np.where(swap, b, a), np.where(swap, a, b), np.where(swap, 1 - w, w)
+            a = np.where(w == 1, b, a)
+            b = np.where(w == 0, a, b)
+            w = np.where((w == 0) | (w == 1), 0., w)
+            keys[j].append(a * n_pts + b)
+            lo.append(a)
+            hi.append(b)
+            t.append(w)
+        cells.append(cids[cell])
+    keys = [np.concatenate(k).astype(np.int64) for k in keys]
+    lo, hi, t = np.concatenate(lo).astype(np.int64), np.concatenate(hi).astype(np.int64), np.concatenate(t)
+    # Number the points in the order they are reached by the lines of the cells, as VTK does, and connect them
+    _, first, inverse = np.unique(np.concatenate(keys), return_index=True, return_inverse=True)
+    cells = np.concatenate(cells).astype(np.int64)
+    order = np.argsort(cells, kind='stable')
+    elems = inverse.reshape(2, -1).T[order, ::-1]
+    cells = cells[order]
+    _, reached = np.unique(elems.reshape(-1), return_index=True)
+    number = np.empty(len(first), dtype=np.int64)
+    number[np.argsort(reached, kind='stable')] = np.arange(len(first))
+    first = first[np.argsort(number)]
+    elems = number[elems]
+    valid = elems[:, 0] != elems[:, 1]
+    ids = np.column_stack((lo[first], hi[first]))
+    weights = np.column_stack((1 - t[first], t[first]))
+    return ids, weights, elems[valid], cells[valid]
+
+def _stencil(groups, dist, value, pts):
+    """Compute the interpolation stencil of the sorted points of a cutplane
+
+    Parameters:
+    groups: list of tuple
+        connectivity, indices, and minimum and maximum distance to the origin of the cells of each type
+    dist: ndarray
+        distance of the points of the grid to the origin along the normal
+    value: float
+        distance of the cutplane to the origin along the normal
+    pts: ndarray
+        points coordinates of the grid
+
+    Returns:
+    ids, weights, elems, loops: ndarray, ndarray, ndarray, list
+        indices of the ends of the edges containing the sorted points, weights of the ends, line connectivity list in sorted numbering and loops
+    """
+    ids, weights, elems, _ = _intersect(groups, dist, value, len(pts))
+    order, elems, loops = _order(elems, _interpolate(pts, ids, weights))
+    return ids[order], weights[order], elems, loops
+
+def _interpolate(values, ids, weights):
+    """Interpolate data defined at the points of a grid linearly between the two ends of edges
+
+    Parameters:
+    values: ndarray
+        values at the points of the grid
+    ids: ndarray
+        indices of the two ends of each edge (n x 2)
+    weights: ndarray
+        weights of the two ends of each edge (n x 2)
+    """
+    values = values.reshape(values.shape[0], -1)
+    return weights[:, 0, None] * values[ids[:, 0]] + weights[:, 1, None] * values[ids[:, 1]]
+
+def _order(elems, pts):
+    """Chain line elements into separate loops and open polylines
+
+    The lines are split into darts (oriented half-lines), 2*i running along line i and 2*i+1 running against it.
+    The dart following another one is the dart leaving its end point through the other line, so that the darts form
+    two oppositely oriented chains per loop or polyline. Chains stop at points not shared by exactly two lines.
+    Since the chains are followed by pointer jumping, the cost is O(n log n). The closed loops start at their point of
+    largest x (the trailing edge of a cross-section) and run clockwise in the (x, z) plane (along the lower side of a
+    cross-section first), so that they depend neither on the numbering of the points nor on the orientation of the cells.
+
+    Parameters:
+    elems: ndarray
+        line connectivity list
+    pts: ndarray
+        points coordinates
+
+    Returns:
+    order: ndarray
+        indices of points sorted along the loops and polylines
+    elems: ndarray
+        line connectivity list in sorted numbering
+    loops: list of tuple
+        first and past-the-last sorted indices of each loop or polyline, and whether it is closed
+    """
+    n_pts = pts.shape[0]
+    n_elm = elems.shape[0]
+    if n_elm == 0:
+        return np.zeros(0, dtype=int), np.zeros((0, 2), dtype=int), []
+    # Create darts and link each dart to the next one
+    n_drt = 2 * n_elm
+    src = elems.reshape(-1).astype(np.int64)
+    dst = elems[:, ::-1].reshape(-1).astype(np.int64)
+    deg = np.bincount(src, minlength=n_pts)
+    outs = np.argsort(src, kind='stable') # darts leaving each point
+    first = np.concatenate(([0], np.cumsum(deg)))[dst]
+    inner = deg[dst] == 2
+    d0 = outs[np.where(inner, first, 0)]
+    d1 = outs[np.where(inner, first + 1, 0)]
+    drt = np.arange(n_drt)
+    nxt = np.where(inner, np.where(d0 == drt ^ 1, d1, d0), -1)
+    # Label each dart with the smallest dart of its chain, using pointer jumping along both directions
+    prv = np.full(n_drt, -1)
+    prv[nxt[nxt >= 0]] = drt[nxt >= 0]
+    fwd = np.where(nxt >= 0, nxt, drt)
+    bwd = np.where(prv >= 0, prv, drt)
+    lab = drt.copy()
+    for _ in range(int(np.ceil(np.log2(n_drt))) + 1):
+        lab = np.minimum(lab, np.minimum(lab[fwd], lab[bwd]))
+        fwd = fwd[fwd]
+        bwd = bwd[bwd]
+    # Keep one orientation per chain, the clockwise one in the (x, z) plane for closed chains and the one of the first line for open chains
+    twin = lab[drt ^ 1]
+    is_open = np.zeros(n_drt, dtype=bool)
+    is_open[lab[nxt < 0]] = True
+    area = np.bincount(lab, pts[src, 0] * pts[dst, 2] - pts[dst, 0] * pts[src, 2], minlength=n_drt)
+    sel = np.flatnonzero(np.where(is_open[lab] | (area[lab] == area[twin]), lab % 2 == 0, area[lab] < area[twin]))
+    labels, cid = np.unique(lab[sel], return_inverse=True)
+    n_chn = len(labels)
+    closed = np.ones(n_chn, dtype=bool)
+    closed[cid[nxt[sel] < 0]] = False
+    # Break the closed chains so that they start at their point of largest x (then largest z and y)
+    key = np.empty(n_pts, dtype=np.int64)
+    key[np.lexsort((-pts[:, 1], -pts[:, 2], -pts[:, 0]))] = np.arange(n_pts)
+    kmin = np.full(n_chn, n_pts)
+    np.minimum.at(kmin, cid, key[src[sel]])
+    nxt_sel = nxt.copy()
+    nxt_sel[sel[closed[cid] & (key[dst[sel]] == kmin[cid])]] = -1
+    # Rank the darts from the head of their chain, using pointer jumping
+    prv = np.full(n_drt, -1)
+    prv[nxt_sel[sel][nxt_sel[sel] >= 0]] = sel[nxt_sel[sel] >= 0]
+    bwd = np.where(prv >= 0, prv, drt)
+    rank = (prv >= 0).astype(np.int64)
+    for _ in range(int(np.ceil(np.log2(n_drt))) + 1):
+        rank = rank + np.where(bwd != drt, rank[bwd], 0)
+        bwd = bwd[bwd]
+    # Get the points sorted along the chains, open chains also contain the end point of their last dart
+    n_dpc = np.bincount(cid, minlength=n_chn)
+    n_ppc = n_dpc + ~closed
+    offsets = np.concatenate(([0], np.cumsum(n_ppc)))
+    pos = offsets[cid] + rank[sel]
+    order = np.zeros(offsets[-1], dtype=np.int64)
+    order[pos] = src[sel]
+    tails = (rank[sel] == n_dpc[cid] - 1) & ~closed[cid]
+    order[pos[tails] + 1] = dst[sel][tails]
+    # Connect consecutive points, and close the closed chains
+    last = (rank[sel] == n_dpc[cid] - 1) & closed[cid]
+    elems = np.column_stack((pos, np.where(last, offsets[cid], pos + 1)))
+    elems = elems[np.argsort(pos), :]
+    loops = [(int(offsets[i]), int(offsets[i + 1]), bool(closed[i])) for i in range(n_chn)]
+    return order, elems, loops
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from .vtk_utils import Cutter
+from .cross_sections import CrossSections
+
+__all__ = ['AdaptiveSlicer']
+
+class AdaptiveSlicer:
+    """Place the spanwise stations adaptively, so that the spanwise lift distribution is integrated accurately
+
+    The grid is first cut at uniformly distributed stations. The intervals between stations where the integration error of
+    the spanload (cl * c), estimated from its second derivative, is larger than its share of the tolerance are then split
+    in two, until the estimated error on the lift coefficient of the wing is below the tolerance.
+
+    Parameters:
+    grid: vtkDataObject
+        object containing grid and data
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on (default: None)
+    tag_id: int
+        ID number to threshold (default: None)
+
+    Attributes:
+    cutter: Cutter
+        cutter of the grid
+    var_name: str
+        name of pressure coefficient variable
+    tag_name: str
+        name of variable to create threshold on
+    tag_id: int
+        ID number to threshold
+    error: float
+        estimated integration error of the lift coefficient after the last run
+    iterations: int
+        number of refinement iterations of the last run
+    """
+    def __init__(self, grid, var_name, tag_name=None, tag_id=None):
+        self.cutter = Cutter(grid, use_index=True)
+        self.var_name = var_name
+        self.tag_name = tag_name
+        self.tag_id = tag_id
+        self.error = None
+        self.iterations = 0
+
+    def run(self, y_min, y_max, aoa=0, n_init=9, tol=1e-3, max_sections=100):
+        """Cut the grid at adaptively placed stations and compute the sectional loads
+
+        Parameters:
+        y_min: float
+            y-coordinate of the first cross-section
+        y_max: float
+            y-coordinate of the last cross-section
+        aoa: float
+            angle of attack in degrees (default: 0.)
+        n_init: int
+            number of uniformly distributed initial cross-sections, at least 3 (default: 9)
+        tol: float
+            tolerance on the estimated integration error of the lift coefficient (default: 1e-3)
+        max_sections: int
+            maximum number of cross-sections (default: 100)
+
+        Returns:
+        loads: CrossSections
+            cross-sectional data and loads, sorted by y-coordinate
+        """
+        sections = []
+        loads = CrossSections()
+        y_new = np.linspace(y_min, y_max, max(3, n_init))
+        self.iterations = 0
+        while True:
+            # Cut the new stations and compute their spanload
+            new = self.__slice(y_new)
+            for s in new:
+                loads.add_section(*s)
+            sections += new
+            cl, _, _ = loads.compute_loads(aoa)
+            order = np.argsort(loads.y_sec, kind='stable')
+            y, chords, load = loads.y_sec[order], loads.chords[order], (cl * loads.chords)[order]
+            # Estimate the error on each interval and select the intervals to split
+            s_ref = np.sum(0.5 * (chords[1:] + chords[:-1]) * np.diff(y))
+            errors = self.__estimate(y, load) / s_ref
+            self.error = float(np.sum(errors))
+            if self.error <= tol or len(y) >= max_sections:
+                break
+            refine = np.flatnonzero(errors > tol * np.diff(y) / (y[-1] - y[0]))
+            refine = refine[np.argsort(errors[refine])[::-1]][:max_sections - len(y)]
+            y_new = 0.5 * (y[refine] + y[refine + 1])
+            self.iterations += 1
+        # Gather the cross-sections sorted by y-coordinate and compute the loads
+        loads = CrossSections()
+        for i in order:
+            loads.add_section(*sections[i])
+        loads.compute_loads(aoa)
+        return loads
+
+    def __slice(self, y_secs):
+        """Cut the grid at several spanwise stations and extract the cross-sectional data
+
+        Parameters:
+        y_secs: array
+            y-coordinates of the cross-sections
+        """
+        self.cutter.cut_many([[0., y, 0.] for y in y_secs], [0., 1., 0.], self.tag_name, self.tag_id)
+        sections = []
+        for i, y in enumerate(y_secs):
+            pts, _, vals = self.cutter.extract([self.var_name], 2, copy=True, slice_id=i)
+            if pts.shape[0] == 0:
+                raise RuntimeError(f'Cutplane at y = {y} does not cross the grid!\n')
+            sections.append((float(y), pts[:, [0, 2]], vals[self.var_name]))
+        return sections
+
+    def __estimate(self, y, f):
+        """Estimate the error of the trapezoidal rule on each interval, from the second derivative of the interpolating parabolas
+
+        Parameters:
+        y: ndarray
+            sorted coordinates
+        f: ndarray
+            values
+        """
+        h = np.diff(y)
+        slope = np.diff(f) / h
+        d2 = np.abs(2 * np.diff(slope) / (h[1:] + h[:-1])) # second derivative at each inner point
+        # Take the largest second derivative of the two parabolas containing each interval
+        d2max = np.zeros(len(h))
+        d2max[:-1] = d2
+        d2max[1:] = np.maximum(d2max[1:], d2)
+        return h**3 / 12 * d2max
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+from .vtk_utils import _grid_to_numpy
+from .profiling import _stage
+
+__all__ = ['SurfaceLoads']
+
+class SurfaceLoads:
+    """Compute the aerodynamic load coefficients by integrating the pressure coefficient over the surface cells of a grid
+
+    The triangles and quadrilaterals of the grid (or of the group defined by a tag) are integrated, the other cells are
+    ignored. The normals of the cells are assumed to be consistently oriented, and are flipped if they point into the volume
+    enclosed by the surface and the plane y = 0, whose sign is computed by the divergence theorem. This holds for a closed
+    surface, or for a half-wing whose surface is only open on the plane y = 0. The orientation of the cells can be used
+    as it is for other surfaces (see compute_loads). The loads have the same sign convention as the ones of CrossSections:
+    a lower pressure on the upper surface (larger z) gives a positive lift.
+
+    Parameters:
+    grid: vtkDataObject
+        object containing grid and data
+    profiler: Profiler
+        profiler recording the computation (default: None)
+
+    Attributes:
+    grid: vtkDataObject
+        object containing grid and data
+    cf: ndarray
+        force coefficients along x, y and z
+    cmo: ndarray
+        moment coefficients about x, y and z, at the reference point
+    cl: float
+        lift coefficient
+    cd: float
+        drag coefficient
+    cm: float
+        pitching moment coefficient
+    profiler: Profiler
+        profiler recording the computation
+    """
+    CHUNK_SIZE = 2**20 # number of cells integrated at once
+    TRIANGLE = 5 # VTK cell types
+    QUAD = 9
+
+    def __init__(self, grid, profiler=None):
+        self.grid = grid
+        self.cf = np.zeros(3)
+        self.cmo = np.zeros(3)
+        self.cl = 0.
+        self.cd = 0.
+        self.cm = 0.
+        self.profiler = profiler
+
+    def compute_loads(self, var_name, aoa=0, tag_name=None, tag_id=None, s_ref=1., c_ref=1., x_ref=None, orient=True):
+        """Compute aerodynamic load coefficients
+
+        Parameters:
+        var_name: str
+            name of pressure coefficient variable, at points or at cells
+        aoa: float
+            angle of attack in degrees (default: 0.)
+        tag_name: str
+            name of variable to select the cells on (default: None)
+        tag_id: int
+            ID number to select (default: None)
+        s_ref: float
+            reference surface (default: 1.)
+        c_ref: float
+            reference chord (default: 1.)
+        x_ref: array
+            coordinates of the moment reference point (default: None, origin)
+        orient: bool
+            whether to orient the normals out of the volume enclosed by the surface and the plane y = 0 (True), or to use
+            the orientation of the cells, whose normals must then point out of the body (default: True)
+        """
+        with _stage(self.profiler, 'SurfaceLoads.compute_loads') as stage:
+            data = _grid_to_numpy(self.grid, [var_name, tag_name] if tag_name else [var_name])
+            # Select the surface cells
+            types = data['types']
+            cells = (types == self.TRIANGLE) | (types == self.QUAD)
+            if tag_name:
+                if 'cell/' + tag_name not in data:
+                    raise RuntimeError(f'Cell variable {tag_name} not found in grid!\n')
+                cells &= data['cell/' + tag_name].reshape(-1) == tag_id
+            cells = np.flatnonzero(cells)
+            if 'point/' + var_name in data:
+                cp, at_point = data['point/' + var_name].reshape(len(data['points']), -1)[:, 0], True
+            elif 'cell/' + var_name in data:
+                cp, at_point = data['cell/' + var_name].reshape(len(types), -1)[:, 0], False
+            else:
+                raise RuntimeError(f'Variable {var_name} not found in grid!\n')
+            # Integrate the force and moment (about the origin) and the volume enclosed by the surface
+            pts = data['points']
+            force = np.zeros(3)
+            moment = np.zeros(3)
+            volume = 0.
+            for ctype, n_v in [(self.TRIANGLE, 3), (self.QUAD, 4)]:
+                ids = cells[types[cells] == ctype]
+                for begin in range(0, len(ids), self.CHUNK_SIZE):
+                    _ids = ids[begin:begin + self.CHUNK_SIZE]
+                    conn = data['connectivity'][data['offsets'][_ids, None] + np.arange(n_v)]
+                    p = pts[conn].astype(float)
+                    # area-weighted normal, exact for non-planar quadrilaterals
+                    if n_v == 3:
+                        area = 0.5 * np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+                    else:
+                        area = 0.5 * np.cross(p[:, 2] - p[:, 0], p[:, 3] - p[:, 1])
+                    center = p.mean(axis=1)
+                    _cp = cp[conn].mean(axis=1) if at_point else cp[_ids]
+                    f = -_cp[:, None] * area
+                    force += f.sum(axis=0)
+                    moment += np.cross(center, f).sum(axis=0)
+                    volume += np.sum(center * area) / 3
+            if orient and volume < 0:
+                force, moment = -force, -moment
+            if x_ref is not None:
+                moment -= np.cross(np.asarray(x_ref, dtype=float), force)
+            stage.count(len(pts), len(cells))
+        # Compute the coefficients and rotate to flow direction
+        self.cf = force / s_ref
+        self.cmo = moment / (s_ref * c_ref)
+        aoa = np.deg2rad(aoa)
+        self.cl = self.cf[2] * np.cos(aoa) - self.cf[0] * np.sin(aoa)
+        self.cd = self.cf[2] * np.sin(aoa) + self.cf[0] * np.cos(aoa)
+        self.cm = self.cmo[1]
+
+    def display(self):
+        """Display the results
+        """
+        print('cl = ', self.cl)
+        print('cm = ', self.cm)
+        print('cd = ', self.cd)
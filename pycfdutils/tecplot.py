@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import multiprocessing as mp
+import mmap
+import os
+import re
+from ._vtk import vtk, numpy_to_vtk, numpy_to_vtkIdTypeArray
+
+__all__ = ['TecplotReader']
+
+class TecplotReader:
+    """Tecplot ASCII finite-element reader
+
+    The zone headers are parsed first, then the numeric data of the requested zones are parsed in bulk with numpy,
+    in parallel chunks for large zones. Ordered, polygonal and polyhedral zones, shared variables and shared connectivity
+    are not supported. On one core, or in the processes of a pool, which parse the zones at once, converting the text into
+    numbers takes most of the time, so that the reader takes about half of the time of vtkTecplotReader.
+
+    Parameters:
+    n_workers: int
+        number of processes used to parse large zones (default: None, number of CPUs)
+
+    Attributes:
+    title: str
+        title of the dataset
+    variables: list of str
+        names of the variables
+    zones: list of dict
+        keyword-value dictionnary of each zone header
+    output: vtkMultiBlockDataSet
+        object containing one grid per zone, or None for zones that were not loaded
+    n_workers: int
+        number of processes used to parse large zones
+    """
+    # Number of vertices and VTK type of finite-element zones
+    ELEMENTS = {
+        'FELINESEG': (2, 3), # VTK_LINE
+        'FETRIANGLE': (3, 5), # VTK_TRIANGLE
+        'FEQUADRILATERAL': (4, 9), # VTK_QUAD
+        'FETETRAHEDRON': (4, 10), # VTK_TETRA
+        'FEBRICK': (8, 12) # VTK_HEXAHEDRON
+    }
+
+    # Minimum size of the chunks parsed in parallel (bytes)
+    CHUNK_SIZE = 2**25
+
+    def __init__(self, n_workers=None):
+        self.title = ''
+        self.variables = []
+        self.zones = []
+        self.output = None
+        self.n_workers = n_workers if n_workers else os.cpu_count()
+
+    def open(self, fname, arrays=None, zones=None):
+        """Open solution file
+
+        Parameters:
+        fname: str
+            name of grid file
+        arrays: array
+            names of variables to load, in addition to the coordinates (default: None, load all variables)
+        zones: array
+            indices or names of zones to load (default: None, load all zones)
+        """
+        with open(fname, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            self.__read(fname, data, arrays, zones)
+
+    def __read(self, fname, data, arrays, zones):
+        """Parse the headers and the data of the requested zones
+
+        Parameters:
+        fname: str
+            name of grid file
+        data: mmap
+            content of grid file
+        arrays: array
+            names of variables to load, in addition to the coordinates
+        zones: array
+            indices or names of zones to load
+        """
+        # Parse file header
+        starts = self.__find_zones(data) + [len(data)]
+        header = data[:starts[0]].decode(errors='replace')
+        m = re.search(r'TITLE\s*=\s*"([^"]*)"', header, re.I)
+        self.title = m.group(1) if m else ''
+        m = re.search(r'VARIABLES\s*=(.*)', header, re.I | re.S)
+        if not m:
+            raise RuntimeError(f'Variables not found in file {fname}!\n')
+        self.variables = re.findall(r'"([^"]*)"', m.group(1)) or re.split(r'[\s,]+', m.group(1).strip())
+        # Parse zone headers
+        self.zones = []
+        bounds = []
+        for i in range(len(starts) - 1):
+            end = starts[i] # look for the first line starting with a number, line by line to avoid copying the data of the zone
+            while end < starts[i + 1] and not re.match(rb'[ \t]*[-+.\d]', data[end:min(end + 256, starts[i + 1])]):
+                end = data.find(b'\n', end, starts[i + 1]) + 1 or starts[i + 1]
+            self.zones.append(self.__parse_header(data[starts[i]:end].decode(errors='replace')))
+            bounds.append((end, starts[i + 1]))
+        # Parse zone data
+        names = [z.get('T', f'Zone {i}') for i, z in enumerate(self.zones)]
+        ids = range(len(self.zones)) if zones is None else [names.index(z) if isinstance(z, str) and z in names else z for z in zones]
+        self.output = vtk.vtkMultiBlockDataSet()
+        self.output.SetNumberOfBlocks(len(self.zones))
+        for i in range(len(self.zones)):
+            self.output.GetMetaData(i).Set(vtk.vtkCompositeDataSet.NAME(), names[i])
+        for i in ids:
+            if isinstance(i, str) or not 0 <= i < len(self.zones):
+                raise RuntimeError(f'Zone {i} not found in file {fname}!\n')
+            self.output.SetBlock(i, self.__read_zone(fname, data, self.zones[i], bounds[i], arrays))
+
+    def __find_zones(self, data):
+        """Find the positions of the zone headers
+
+        Parameters:
+        data: mmap
+            content of grid file
+        """
+        starts = []
+        for key in [b'Z', b'z']: # single characters are found much faster, and are not found in numeric data
+            pos = data.find(key)
+            while pos >= 0:
+                line = data.rfind(b'\n', 0, pos) + 1
+                if data[pos:pos + 4] in [b'ZONE', b'Zone', b'zone'] and not data[line:pos].strip() and not data[pos + 4:pos + 5].isalnum():
+                    starts.append(line)
+                pos = data.find(key, pos + 1)
+        return sorted(starts)
+
+    def __parse_header(self, text):
+        """Parse the keywords of a zone header
+
+        Parameters:
+        text: str
+            zone header
+        """
+        zone = {}
+        for key, val in re.findall(r'(\w+)\s*=\s*("[^"]*"|\([^)]*\)|[^,\s]+)', text[text.upper().index('ZONE') + 4:]):
+            zone[key.upper()] = val.strip('"') if val.startswith('"') else val.upper()
+        # Convert old-style keywords
+        if 'N' in zone:
+            zone.setdefault('NODES', zone['N'])
+        if 'E' in zone:
+            zone.setdefault('ELEMENTS', zone['E'])
+        if 'F' in zone:
+            zone.setdefault('DATAPACKING', 'BLOCK' if 'BLOCK' in zone['F'] else 'POINT')
+            if zone['F'].startswith('FE'):
+                zone.setdefault('ZONETYPE', 'FE' + zone.get('ET', ''))
+        return zone
+
+    def __read_zone(self, fname, data, zone, bounds, arrays):
+        """Build the grid of a zone
+
+        Parameters:
+        fname: str
+            name of grid file
+        data: mmap
+            content of grid file
+        zone: dict
+            keyword-value dictionnary of zone header
+        bounds: tuple
+            first and past-the-last positions of the numeric data of zone in file
+        arrays: array
+            names of variables to load, in addition to the coordinates
+        """
+        # Check zone type
+        ztype = zone.get('ZONETYPE', 'ORDERED')
+        if ztype not in self.ELEMENTS or 'NODES' not in zone or 'ELEMENTS' not in zone:
+            raise NotImplementedError(f'Zone type {ztype} not supported!\n')
+        if 'VARSHARELIST' in zone or 'CONNECTIVITYSHAREZONE' in zone:
+            raise NotImplementedError('Shared variables and connectivity not supported!\n')
+        n_nodes = int(zone['NODES'])
+        n_elems = int(zone['ELEMENTS'])
+        n_verts, vtk_type = self.ELEMENTS[ztype]
+        n_vars = len(self.variables)
+        cell_centered = self.__parse_locations(zone.get('VARLOCATION', ''), n_vars)
+        sizes = np.where(cell_centered, n_elems, n_nodes)
+        # Parse the variables and the connectivity separately, the connectivity being given one element per line
+        n_vals = sizes.sum()
+        start = self.__find_connectivity(data, bounds, n_elems)
+        values = self.__parse(fname, data, bounds[0], start, float)
+        conn = self.__parse(fname, data, start, bounds[1], np.int64)
+        if len(values) != n_vals or len(conn) != n_elems * n_verts:
+            values = self.__parse(fname, data, bounds[0], bounds[1], float)
+            if len(values) != n_vals + n_elems * n_verts:
+                raise RuntimeError(f'Zone {zone.get("T", "")} contains {len(values)} values but {n_vals + n_elems * n_verts} were expected!\n')
+            conn = values[n_vals:].astype(np.int64)
+            values = values[:n_vals]
+        if zone.get('DATAPACKING', 'BLOCK') == 'POINT':
+            if cell_centered.any():
+                raise RuntimeError('Cell-centered variables cannot be given in POINT data packing!\n')
+            vars = values.reshape(n_nodes, n_vars).T
+        else:
+            vars = np.split(values, np.cumsum(sizes)[:-1])
+        conn -= 1
+        # Create grid
+        grid = vtk.vtkUnstructuredGrid()
+        icoord = self.__get_coordinates()
+        xyz = np.zeros((n_nodes, 3))
+        for j, i in enumerate(icoord):
+            xyz[:, j] = vars[i]
+        pts = vtk.vtkPoints()
+        pts.SetData(numpy_to_vtk(xyz, deep=1))
+        grid.SetPoints(pts)
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_to_vtkIdTypeArray(np.arange(0, n_elems * n_verts + 1, n_verts, dtype=np.int64), deep=1), numpy_to_vtkIdTypeArray(conn, deep=1))
+        grid.SetCells(vtk_type, cells)
+        # Add data
+        for i, name in enumerate(self.variables):
+            if i in icoord or (arrays is not None and name not in arrays):
+                continue
+            vals = numpy_to_vtk(np.ascontiguousarray(vars[i]), deep=1)
+            vals.SetName(name)
+            if cell_centered[i]:
+                grid.GetCellData().AddArray(vals)
+            else:
+                grid.GetPointData().AddArray(vals)
+        return grid
+
+    def __find_connectivity(self, data, bounds, n_elems):
+        """Find the position of the connectivity, assuming that its last lines contain one element each
+
+        Parameters:
+        data: mmap
+            content of grid file
+        bounds: tuple
+            first and past-the-last positions of the numeric data of zone in file
+        n_elems: int
+            number of elements
+        """
+        buf = np.frombuffer(data, dtype=np.uint8, count=bounds[1] - bounds[0], offset=bounds[0])
+        end = len(buf)
+        while end > 0 and buf[end - 1] in b' \t\r\n':
+            end -= 1
+        # Look for the newlines in a window large enough to contain the connectivity, or in the whole zone
+        window = min(end, 2 * n_elems * 8 * (len(str(n_elems)) + 3))
+        for begin in [end - window, 0]:
+            lines = np.flatnonzero(buf[begin:end] == ord('\n'))
+            if len(lines) >= n_elems:
+                return bounds[0] + begin + lines[len(lines) - n_elems] + 1
+        return bounds[1]
+
+    def __parse(self, fname, data, start, end, dtype):
+        """Parse numbers at once, or by chunks split at whitespaces in parallel
+
+        Parameters:
+        fname: str
+            name of grid file
+        data: mmap
+            content of grid file
+        start: int
+            first position of numbers in file
+        end: int
+            past-the-last position of numbers in file
+        dtype: type
+            type of numbers
+        """
+        n_chunks = max(1, min(self.n_workers, (end - start) // self.CHUNK_SIZE))
+        if n_chunks == 1 or mp.current_process().daemon: # the processes of a pool cannot create processes
+            return _parse(data[start:end], dtype)
+        cuts = [start]
+        for i in range(1, n_chunks):
+            pos = start + i * (end - start) // n_chunks
+            while pos < end and data[pos:pos + 1] not in b' \t\r\n,':
+                pos += 1
+            cuts.append(pos)
+        cuts.append(end)
+        with mp.Pool(n_chunks) as pool:
+            return np.concatenate(pool.starmap(_parse_file, [(fname, cuts[i], cuts[i + 1], dtype) for i in range(n_chunks)]))
+
+    def __parse_locations(self, text, n_vars):
+        """Parse the location of the variables
+
+        Parameters:
+        text: str
+            value of VARLOCATION keyword, such as ([3-4, 6]=CELLCENTERED)
+        n_vars: int
+            number of variables
+        """
+        cell_centered = np.zeros(n_vars, dtype=bool)
+        for ranges, loc in re.findall(r'\[([^\]]*)\]\s*=\s*(\w+)', text):
+            for r in ranges.split(','):
+                bounds = [int(b) for b in r.split('-')]
+                cell_centered[bounds[0] - 1:bounds[-1]] = loc.upper() == 'CELLCENTERED'
+        return cell_centered
+
+    def __get_coordinates(self):
+        """Get the indices of the variables defining the coordinates
+        """
+        names = [v.strip().lower() for v in self.variables]
+        icoord = []
+        for c in ['x', 'y', 'z']:
+            for i, n in enumerate(names):
+                if n in [c, 'coordinate' + c, 'points:' + c]:
+                    icoord.append(i)
+                    break
+        if len(icoord) < 2:
+            icoord = list(range(min(3, len(names))))
+        return icoord
+
+def _parse(text, dtype):
+    """Parse whitespace or comma-separated numbers
+
+    Parameters:
+    text: bytes
+        numbers
+    dtype: type
+        type of numbers
+    """
+    if b',' in text:
+        text = text.replace(b',', b' ')
+    return np.fromstring(text, dtype=dtype, sep=' ')
+
+def _parse_file(fname, start, end, dtype):
+    """Parse whitespace or comma-separated numbers in a part of a file
+
+    Parameters:
+    fname: str
+        name of file
+    start: int
+        first position in file
+    end: int
+        past-the-last position in file
+    dtype: type
+        type of numbers
+    """
+    with open(fname, 'rb') as f:
+        f.seek(start)
+        return _parse(f.read(end - start), dtype)
@@ -15,32 +15,136 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-try:
-    import vtk
-except:
-    raise RuntimeError('VTK not found!\n')
 import numpy as np
-import os.path
+import multiprocessing as mp
+import os
+from collections import OrderedDict
+from xml.etree import ElementTree
+from ._vtk import vtk, vtk_to_numpy, numpy_to_vtk, numpy_to_vtkIdTypeArray
+from .tecplot import TecplotReader
+from .slicing import CutStencil, _surface_groups, _stencil, _order
+from .profiling import _stage
+
+__all__ = ['Reader', 'Cutter', 'PartitionedGrid']
 
 class Reader:
     """VTK grid reader
 
+    Partitioned files (parallel VTK .pvtu and multiblock VTK .vtm files) are not read, the files of their pieces are listed
+    in a PartitionedGrid, and are read when the pieces are cut.
+
+    Parameters:
+    cache: GridCache
+        on-disk cache of grids, used to avoid parsing the same file again (default: None)
+    profiler: Profiler
+        profiler recording the stages of the reading (default: None)
+
     Attributes:
-    grid: vtkDataObject
-        object containing grid and data
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
+    cache: GridCache
+        on-disk cache of grids
+    profiler: Profiler
+        profiler recording the stages of the reading
     """
-    def __init__(self):
+    def __init__(self, cache=None, profiler=None):
         self.grid = None
+        self.cache = cache
+        self.profiler = profiler
 
-    def open(self, fname):
+    def open(self, fname, arrays=None, blocks=None):
         """Open solution file
 
         Parameters:
         fname: str
             name of grid file
+        arrays: array
+            names of point and cell data to load, including the tag if one is needed (default: None, load all data)
+        blocks: array
+            indices or names of blocks (Tecplot zones) to load and merge, or of pieces of a partitioned file to list (default: None, load first block, or list all pieces)
+        """
+        with _stage(self.profiler, 'Reader.open') as stage:
+            # List the pieces of a partitioned file
+            if os.path.splitext(fname)[1] in ['.pvtu', '.vtm']:
+                self.grid = self.__list_pieces(fname, arrays, blocks)
+                return
+            # Map the grid from the cache
+            data = None
+            if self.cache is not None and os.path.isfile(fname):
+                with _stage(self.profiler, 'Reader.cache_load'):
+                    data = self.cache.load(fname, arrays, blocks)
+            if data is not None:
+                self.grid = _numpy_to_grid(data)
+            # Read the grid and store it in the cache
+            else:
+                with _stage(self.profiler, 'Reader.read') as read:
+                    self.__read(fname, arrays, blocks)
+                    read.count(self.grid.GetNumberOfPoints(), self.grid.GetNumberOfCells())
+                if self.cache is not None:
+                    with _stage(self.profiler, 'Reader.cache_store'):
+                        self.cache.store(fname, _grid_to_numpy(self.grid), arrays, blocks)
+            stage.count(self.grid.GetNumberOfPoints(), self.grid.GetNumberOfCells())
+
+    def __list_pieces(self, fname, arrays, blocks):
+        """List the files of the pieces of a parallel VTK (.pvtu) or multiblock VTK (.vtm) file
+
+        Parameters:
+        fname: str
+            name of partitioned file
+        arrays: array
+            names of point and cell data to load
+        blocks: array
+            indices or names of pieces to list
+        """
+        if not os.path.isfile(fname):
+            raise RuntimeError(f'File {fname} not found!\n')
+        root = ElementTree.parse(fname).getroot()
+        if fname.endswith('.pvtu'):
+            pieces = [(p.get('Source'), None) for p in root.iter('Piece') if p.get('Source')]
+        else:
+            pieces = [(d.get('file'), d.get('name')) for d in root.iter('DataSet') if d.get('file')]
+        names = [name for _, name in pieces]
+        ids = range(len(pieces)) if blocks is None else []
+        for b in blocks if blocks is not None else []:
+            if isinstance(b, str):
+                if b not in names:
+                    raise RuntimeError(f'Block {b} not found!\n')
+                ids.append(names.index(b))
+            elif 0 <= b < len(pieces):
+                ids.append(b)
+            else:
+                raise RuntimeError(f'Block {b} not found!\n')
+        fnames = [os.path.join(os.path.dirname(fname), pieces[i][0]) for i in ids]
+        return PartitionedGrid(fnames, [names[i] for i in ids], arrays)
+
+    def __read(self, fname, arrays, blocks):
+        """Read solution file
+
+        Parameters:
+        fname: str
+            name of grid file
+        arrays: array
+            names of point and cell data to load
+        blocks: array
+            indices or names of blocks (Tecplot zones) to load and merge
         """
         # Get format
         fmt = os.path.splitext(fname)[1]
+        if fmt not in ['.dat', '.vtk', '.vtu']:
+            raise RuntimeError(f'Reader for format {fmt} not implemented!\n')
+        # Open file
+        if not os.path.isfile(fname):
+            raise RuntimeError(f'File {fname} not found!\n')
+        # Read Tecplot file with the native reader if possible
+        if fmt == '.dat':
+            try:
+                tecplot = TecplotReader()
+                tecplot.open(fname, arrays, [0] if blocks is None else blocks)
+                self.grid = self.__merge_blocks(tecplot.output, blocks)
+                self.__select_arrays(fname, arrays)
+                return
+            except NotImplementedError as e:
+                print(f'{e}Falling back to VTK Tecplot reader.\n')
         # Create reader
         if fmt == '.dat':
             reader = vtk.vtkTecplotReader()
@@ -50,37 +154,152 @@ class Reader:
             reader.ReadAllVectorsOn()
             reader.ReadAllTensorsOn()
             reader.ReadAllFieldsOn()
-        elif fmt == '.vtu':
-            reader = vtk.vtkXMLUnstructuredGridReader()
         else:
-            raise RuntimeError(f'Reader for format {fmt} not implemented!\n')
-        # Open file
-        if not os.path.isfile(fname):
-            raise RuntimeError(f'File {fname} not found!\n')
+            reader = vtk.vtkXMLUnstructuredGridReader()
         reader.SetFileName(fname)
+        # Select data to load (the legacy VTK reader cannot select several arrays, they are removed after reading)
+        if arrays is not None:
+            reader.UpdateInformation()
+            if fmt == '.dat':
+                for i in range(reader.GetNumberOfDataArrays()):
+                    name = reader.GetDataArrayName(i)
+                    reader.SetDataArrayStatus(name, name in arrays)
+            elif fmt == '.vtu':
+                for selection in [reader.GetPointDataArraySelection(), reader.GetCellDataArraySelection()]:
+                    selection.DisableAllArrays()
+                    for name in list(arrays) + [vtk.vtkDataSetAttributes.GhostArrayName()]:
+                        if selection.ArrayExists(name):
+                            selection.EnableArray(name)
         reader.Update()
         # Get grid data
         if fmt == '.dat':
-            self.grid = reader.GetOutput().GetBlock(0)
+            self.grid = self.__merge_blocks(reader.GetOutput(), blocks)
         elif fmt == '.vtk' or fmt == '.vtu':
+            if blocks is not None:
+                print(f'Block selection not available for format {fmt}. Skipping selection!\n')
             self.grid = reader.GetOutput()
+        self.__select_arrays(fname, arrays)
+
+    def __select_arrays(self, fname, arrays):
+        """Remove the data that were not selected (except the ghost cells flags) and check that the selected ones exist
+
+        Parameters:
+        fname: str
+            name of grid file
+        arrays: array
+            names of point and cell data to keep (None to keep all data)
+        """
+        if arrays is None:
+            return
+        for data in [self.grid.GetPointData(), self.grid.GetCellData()]:
+            for name in [data.GetArrayName(i) for i in range(data.GetNumberOfArrays())]:
+                if name not in arrays and name != vtk.vtkDataSetAttributes.GhostArrayName():
+                    data.RemoveArray(name)
+        for name in arrays:
+            if not self.grid.GetPointData().HasArray(name) and not self.grid.GetCellData().HasArray(name):
+                raise RuntimeError(f'Array {name} not found in file {fname}!\n')
+
+    def __merge_blocks(self, mblock, blocks):
+        """Get one block or merge several blocks of a multiblock dataset
+
+        Parameters:
+        mblock: vtkMultiBlockDataSet
+            multiblock dataset
+        blocks: array
+            indices or names of blocks to merge (None to get the first block)
+        """
+        if blocks is None:
+            return mblock.GetBlock(0)
+        # Get the blocks
+        names = [mblock.GetMetaData(i).Get(vtk.vtkCompositeDataSet.NAME()) if mblock.HasMetaData(i) else None for i in range(mblock.GetNumberOfBlocks())]
+        ids = []
+        for b in blocks:
+            if isinstance(b, str):
+                if b not in names:
+                    raise RuntimeError(f'Block {b} not found!\n')
+                ids.append(names.index(b))
+            elif 0 <= b < mblock.GetNumberOfBlocks():
+                ids.append(b)
+            else:
+                raise RuntimeError(f'Block {b} not found!\n')
+        if len(ids) == 1:
+            return mblock.GetBlock(ids[0])
+        # Merge the blocks, sharing their common points
+        append = vtk.vtkAppendFilter()
+        append.MergePointsOn()
+        for i in ids:
+            append.AddInputData(mblock.GetBlock(i))
+        append.Update()
+        return append.GetOutput()
 
 class Cutter:
     """Manage data extraction from a cutplane
 
+    The pieces of a partitioned grid are read and cut independently in a pool of processes, so that the memory needed by each
+    process is bounded by the size of the largest piece. The blocks of a multiblock grid are cut one after the other. The pieces
+    (or blocks) whose bounding box does not cross the cutplanes are skipped, and the cutplanes of the pieces are stitched by
+    merging their common points.
+
     Parameters:
-    grid: vtkDataObject
-        object containing grid and data
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
+    cache_size: int
+        maximum number of thresholded subsets of the grid kept in cache (default: 4)
+    use_index: bool
+        whether to cut only the cells whose extent along the normal crosses the cutplane in cut, as always done by cut_many (default: False)
+    profiler: Profiler
+        profiler recording the stages of the cut and of the extraction (default: None)
+    n_workers: int
+        number of processes used to cut the pieces of a partitioned grid (default: None, number of CPUs)
 
     Attributes:
-    grid: vtkDataObject
-        object containing grid and data
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
     slice: vtkPolyData
         objects containing grid and data in cutplane
+    slices: list of vtkPolyData
+        objects containing grid and data in each cutplane created by cut_many
+    loops: list of tuple
+        first and past-the-last indices of the points of each loop or polyline, and whether it is closed, for the last sorted extraction
+    cache_size: int
+        maximum number of thresholded subsets of the grid (and of indices) kept in cache
+    use_index: bool
+        whether to cut only the cells whose extent along the normal crosses the cutplane
+    cache_hits: int
+        number of times a thresholded subset of the grid was found in cache
+    cache_misses: int
+        number of times a thresholded subset of the grid had to be computed
+    profiler: Profiler
+        profiler recording the stages of the cut and of the extraction
+    n_workers: int
+        number of processes used to cut the pieces of a partitioned grid
     """
-    def __init__(self, grid):
+    # Maximum number of candidate cells times number of cutplanes of the bands of cutplanes created together by cut_many
+    BAND_SIZE = 2**18
+    # Minimum number of cells of the grids whose candidate cells are extracted before being cut by cut_many
+    MIN_EXTRACT = 2**15
+
+    def __init__(self, grid, cache_size=4, use_index=False, profiler=None, n_workers=None):
         self.grid = grid
         self.slice = None
+        self.slices = []
+        self.loops = []
+        self.cache_size = cache_size
+        self.use_index = use_index
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.profiler = profiler
+        self.n_workers = n_workers if n_workers else os.cpu_count()
+        self.__cache = OrderedDict()
+        self.__indices = OrderedDict()
+        self.__blocks = (None, [])
+
+    def clear_cache(self):
+        """Remove all the thresholded subsets of the grid and all the indices from the cache
+        """
+        self.__cache.clear()
+        self.__indices.clear()
+        self.__blocks = (None, [])
 
     def cut(self, cut_orig, cut_norm, tag_name=None, tag_id=None):
         """Create a cutplane on the grid or on a subset of it
@@ -95,29 +314,422 @@ class Cutter:
         tag_id: int
             ID number to threshold (default: None)
         """
+        # Cut the pieces of a partitioned or multiblock grid
+        if _is_partitioned(self.grid):
+            norm = np.asarray(cut_norm, dtype=float)
+            norm = norm / np.linalg.norm(norm)
+            with _stage(self.profiler, 'Cutter.cut') as stage:
+                self.slice = self.__cut_pieces(norm, np.array([np.dot(cut_orig, norm)]), tag_name, tag_id)[0]
+                stage.count(self.slice.GetNumberOfPoints(), self.slice.GetNumberOfCells())
+            return
+        # Create cut plane
+        plane = vtk.vtkPlane()
+        plane.SetOrigin(cut_orig[0], cut_orig[1], cut_orig[2])
+        plane.SetNormal(cut_norm[0], cut_norm[1], cut_norm[2])
+        # Cut the threshold or the grid and get data
+        with _stage(self.profiler, 'Cutter.cut') as stage:
+            cutter = vtk.vtkCutter()
+            cutter.SetCutFunction(plane)
+            cutter.SetInputDataObject(self.__get_candidates(tag_name, tag_id, cut_norm, [np.dot(cut_orig, cut_norm) / np.linalg.norm(cut_norm)]))
+            cutter.Update()
+            self.slice = cutter.GetOutput()
+            stage.count(self.slice.GetNumberOfPoints(), self.slice.GetNumberOfCells())
+
+    def cut_many(self, cut_origs, cut_norm, tag_name=None, tag_id=None):
+        """Create several parallel cutplanes on the grid or on a subset of it
+
+        The cutplanes of an unstructured grid only cut the cells whose extent along the normal crosses them, using the index of
+        the cells (see use_index), and are created by bands of consecutive cutplanes. Other datasets are cut in a single pass,
+        using one contour value per cutplane.
+
+        Parameters:
+        cut_origs: array
+            coordinates of origin of each cutplane (n x 3), or signed distance of each cutplane from the global origin along the normal (n)
+        cut_norm: array
+            components of vector normal to cutplanes
+        tag_name: str
+            name of variable to create threshold on (default: None)
+        tag_id: int
+            ID number to threshold (default: None)
+        """
+        # Compute the value of the plane function for each cut
+        norm = np.asarray(cut_norm, dtype=float)
+        norm = norm / np.linalg.norm(norm)
+        origs = np.asarray(cut_origs, dtype=float)
+        if origs.ndim == 2:
+            dists = origs @ norm
+        else:
+            dists = origs.reshape(-1)
+        values, inverse = np.unique(dists, return_inverse=True)
+        # Cut the pieces of a partitioned or multiblock grid
+        if _is_partitioned(self.grid):
+            with _stage(self.profiler, 'Cutter.cut_many') as stage:
+                slices = self.__cut_pieces(norm, values, tag_name, tag_id)
+                stage.count(sum(s.GetNumberOfPoints() for s in slices), sum(s.GetNumberOfCells() for s in slices))
+            self.slices = [slices[i] for i in inverse.reshape(-1)]
+            return
+        with _stage(self.profiler, 'Cutter.cut_many') as stage:
+            dataset = self.__get_input(tag_name, tag_id)
+            if dataset.IsA('vtkUnstructuredGrid') and dataset.GetNumberOfCells() > 0:
+                slices = self.__cut_bands(dataset, tag_name, tag_id, norm, values)
+            else:
+                slices = self.__cut_values(dataset, norm, values)
+            stage.count(sum(s.GetNumberOfPoints() for s in slices), sum(s.GetNumberOfCells() for s in slices))
+            self.slices = [slices[i] for i in inverse.reshape(-1)]
+
+    def cut_stencil(self, cut_origs, cut_norm, tag_name=None, tag_id=None):
+        """Compute the interpolation stencils of the sorted points of several parallel cutplanes, on the surface cells of the grid
+
+        The points of the cutplanes are computed from the intersections of the plane with the edges of the triangles and
+        quadrilaterals of the grid, as by NumpyCutter, and are sorted along the loops as by extract. The stencils can be applied to
+        the data of other solutions defined on the same grid.
+
+        Parameters:
+        cut_origs: array
+            coordinates of origin of each cutplane (n x 3), or signed distance of each cutplane from the global origin along the normal (n)
+        cut_norm: array
+            components of vector normal to cutplanes
+        tag_name: str
+            name of cell variable to select the cells on (default: None)
+        tag_id: int
+            ID number to select (default: None)
+
+        Returns:
+        stencil: CutStencil
+            interpolation stencils of the cutplanes
+        """
+        if _is_partitioned(self.grid):
+            raise RuntimeError('cut_stencil is not available for partitioned or multiblock grids!\n')
+        norm = np.asarray(cut_norm, dtype=float)
+        norm = norm / np.linalg.norm(norm)
+        origs = np.asarray(cut_origs, dtype=float)
+        dists = origs @ norm if origs.ndim == 2 else origs.reshape(-1)
+        # Get the surface cells
+        data = _grid_to_numpy(self.grid, [tag_name] if tag_name else [])
+        groups, dist = _surface_groups(data, norm, tag_name, tag_id)
+        # Intersect each cutplane
+        with _stage(self.profiler, 'Cutter.cut_stencil') as stage:
+            stencils = [_stencil(groups, dist, v, data['points']) for v in dists]
+            stage.count(sum(len(s[0]) for s in stencils), sum(len(s[2]) for s in stencils))
+        return CutStencil(data['points'], stencils)
+
+    def __cut_pieces(self, norm, values, tag_name, tag_id):
+        """Cut the pieces of a partitioned or multiblock grid crossing the cutplanes, and stitch their cutplanes
+
+        Parameters:
+        norm: ndarray
+            unit vector normal to cutplanes
+        values: ndarray
+            sorted signed distances of the cutplanes from the global origin along the normal
+        tag_name: str
+            name of variable to create threshold on
+        tag_id: int
+            ID number to threshold
+
+        Returns:
+        slices: list of vtkPolyData
+            objects containing grid and data in each cutplane
+        """
+        fragments = []
+        with _stage(self.profiler, 'Cutter.pieces') as stage:
+            # Read and cut the pieces of a partitioned grid in parallel, their bounding boxes are known once they have been read
+            if isinstance(self.grid, PartitionedGrid):
+                grid = self.grid
+                ids = [i for i in range(len(grid)) if _crosses(grid.bounds[i], norm, values)]
+                args = [(grid.fnames[i], grid.arrays, tag_name, tag_id, norm, values) for i in ids]
+                n_workers = max(1, min(self.n_workers, len(ids)))
+                if n_workers == 1 or mp.current_process().daemon: # the processes of a pool cannot create processes
+                    results = [_cut_piece(*a) for a in args]
+                else:
+                    with mp.Pool(n_workers) as pool:
+                        results = pool.starmap(_cut_piece, args)
+                for i, (bounds, slices) in zip(ids, results):
+                    grid.bounds[i] = bounds
+                    if slices is not None:
+                        fragments.append([_numpy_to_poly(data) for data in slices])
+            # Cut the blocks of a multiblock grid one after the other, keeping one cutter per block to reuse their caches
+            else:
+                if self.__blocks[0] is not self.grid:
+                    self.__blocks = (self.grid, [Cutter(block, self.cache_size, self.use_index) for block in _leaves(self.grid)])
+                for cutter in self.__blocks[1]:
+                    if _crosses(cutter.grid.GetBounds(), norm, values):
+                        cutter.cut_many(values, norm, tag_name, tag_id)
+                        fragments.append(cutter.slices)
+            stage.count(sum(f.GetNumberOfPoints() for s in fragments for f in s), sum(f.GetNumberOfCells() for s in fragments for f in s))
+        with _stage(self.profiler, 'Cutter.stitch'):
+            return [_stitch([s[k] for s in fragments]) for k in range(len(values))]
+
+    def __get_input(self, tag_name, tag_id):
+        """Get the grid or the subset of the grid to cut
+
+        Parameters:
+        tag_name: str
+            name of variable to create threshold on
+        tag_id: int
+            ID number to threshold
+        """
+        if not tag_name:
+            return self.grid
+        # Look for the threshold in cache, it is only valid if the grid has not changed since it was created
+        key = (tag_name, tag_id)
+        if key in self.__cache:
+            grid, mtime, subgrid = self.__cache[key]
+            if grid is self.grid and mtime == self.grid.GetMTime():
+                self.__cache.move_to_end(key)
+                self.cache_hits += 1
+                return subgrid
+            del self.__cache[key]
+        self.cache_misses += 1
         # Create a threshold containing the physical group to cut
-        if tag_name:
+        with _stage(self.profiler, 'Cutter.threshold') as stage:
             thresh = vtk.vtkThreshold()
             thresh.SetLowerThreshold(tag_id)
             thresh.SetUpperThreshold(tag_id)
             thresh.SetInputDataObject(self.grid)
             thresh.SetInputArrayToProcess(0, 0, 0, vtk.vtkDataObject.FIELD_ASSOCIATION_CELLS, tag_name)
             thresh.Update()
-        # Create cut plane
+            subgrid = thresh.GetOutput()
+            stage.count(subgrid.GetNumberOfPoints(), subgrid.GetNumberOfCells())
+        # Store the threshold in cache and evict the least recently used ones
+        if self.cache_size > 0:
+            self.__cache[key] = (self.grid, self.grid.GetMTime(), subgrid)
+            while len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+        return subgrid
+
+    def __get_candidates(self, tag_name, tag_id, cut_norm, values):
+        """Get the grid or the subset of the grid to cut, restricted to the cells crossing the cutplanes if an index is used
+
+        Parameters:
+        tag_name: str
+            name of variable to create threshold on
+        tag_id: int
+            ID number to threshold
+        cut_norm: array
+            components of vector normal to cutplanes
+        values: array
+            signed distances of the cutplanes from the global origin along the normal
+        """
+        dataset = self.__get_input(tag_name, tag_id)
+        if not self.use_index or not dataset.IsA('vtkUnstructuredGrid') or dataset.GetNumberOfCells() == 0:
+            return dataset
+        # Get the cells whose extent contains the cutplanes
+        index = self.__get_index(dataset, tag_name, tag_id, cut_norm)
+        ids = np.unique(np.concatenate([_candidates(index, v, v) for v in values])).astype(np.int64)
+        if len(ids) == dataset.GetNumberOfCells():
+            return dataset
+        # Extract the candidate cells
+        extract = vtk.vtkExtractCells()
+        extract.SetInputDataObject(dataset)
+        extract.SetCellIds(ids, len(ids))
+        extract.AssumeSortedAndUniqueIdsOn()
+        extract.Update()
+        subgrid = vtk.vtkUnstructuredGrid()
+        subgrid.ShallowCopy(extract.GetOutput())
+        subgrid.GetCellData().RemoveArray('vtkOriginalCellIds')
+        return subgrid
+
+    def __get_index(self, dataset, tag_name, tag_id, cut_norm):
+        """Get the index of the cells of the grid or of the subset of the grid along a direction, from the cache if possible
+
+        Parameters:
+        dataset: vtkUnstructuredGrid
+            grid or subset of the grid
+        tag_name: str
+            name of variable the subset was thresholded on
+        tag_id: int
+            ID number the subset was thresholded on
+        cut_norm: array
+            components of vector normal to cutplanes
+        """
+        norm = np.asarray(cut_norm, dtype=float)
+        norm = norm / np.linalg.norm(norm)
+        # Look for the index in cache, or build it
+        key = (tag_name, tag_id, tuple(norm))
+        if key in self.__indices:
+            grid, mtime, index = self.__indices[key]
+            if grid is dataset and mtime == dataset.GetMTime():
+                self.__indices.move_to_end(key)
+                return index
+        with _stage(self.profiler, 'Cutter.index') as stage:
+            index = self.__build_index(dataset, norm)
+            stage.count(dataset.GetNumberOfPoints(), dataset.GetNumberOfCells())
+        if self.cache_size > 0:
+            self.__indices[key] = (dataset, dataset.GetMTime(), index)
+            while len(self.__indices) > self.cache_size:
+                self.__indices.popitem(last=False)
+        return index
+
+    def __cut_bands(self, dataset, tag_name, tag_id, norm, values):
+        """Cut the planes through the cells of an unstructured grid crossing them only, by bands of consecutive cutplanes
+
+        The cutplanes are grouped so that the number of candidate cells of a band times its number of cutplanes stays below
+        BAND_SIZE, because each cell is contoured once per cutplane of its band. Grids containing 3D cells are cut one plane at a
+        time, because VTK contours linear 3D cells much faster for a single plane than for several contour values. The candidate
+        cells of small grids are not extracted, because extracting them costs more than cutting the whole grid.
+
+        Parameters:
+        dataset: vtkUnstructuredGrid
+            grid or subset of the grid
+        tag_name: str
+            name of variable the subset was thresholded on
+        tag_id: int
+            ID number the subset was thresholded on
+        norm: ndarray
+            unit vector normal to cutplanes
+        values: ndarray
+            sorted signed distances of the cutplanes from the global origin along the normal
+        """
+        index = self.__get_index(dataset, tag_name, tag_id, norm)
+        data = _grid_to_numpy(dataset)
+        new_ids = np.empty(len(data['points']), dtype=np.int64) # work array used to number the points of the candidate cells
+        band_size = self.BAND_SIZE if all(_cell_dimension(t) < 3 for t in np.flatnonzero(np.bincount(data['types']))) else 0
+        slices = []
+        start = 0
+        for end in range(1, len(values) + 1):
+            if end < len(values) and _candidates(index, values[start], values[end], count=True) * (end + 1 - start) <= band_size:
+                continue
+            # Cut the band of cutplanes through the candidate cells
+            ids = np.sort(_candidates(index, values[start], values[end - 1]))
+            if len(ids) == dataset.GetNumberOfCells() or (len(ids) > 0 and dataset.GetNumberOfCells() < self.MIN_EXTRACT):
+                slices += self.__cut_values(dataset, norm, values[start:end])
+            elif len(ids) > 0:
+                slices += self.__cut_values(_numpy_to_grid(_extract_cells(data, ids, new_ids)), norm, values[start:end])
+            else: # empty cutplanes, with the data arrays of the grid
+                for _ in range(start, end):
+                    _slice = vtk.vtkPolyData()
+                    self.__copy_data(dataset.GetPointData(), _slice.GetPointData(), ids)
+                    self.__copy_data(dataset.GetCellData(), _slice.GetCellData(), ids)
+                    slices.append(_slice)
+            start = end
+        return slices
+
+    def __cut_values(self, dataset, norm, values):
+        """Cut a dataset by one plane, or by several planes using one contour value per cutplane and split the cutplanes
+
+        Parameters:
+        dataset: vtkDataObject
+            object to cut
+        norm: ndarray
+            unit vector normal to cutplanes
+        values: ndarray
+            sorted signed distances of the cutplanes from the global origin along the normal
+        """
         plane = vtk.vtkPlane()
-        plane.SetOrigin(cut_orig[0], cut_orig[1], cut_orig[2])
-        plane.SetNormal(cut_norm[0], cut_norm[1], cut_norm[2])
-        # Cut the threshold or the grid and get data
+        plane.SetNormal(norm[0], norm[1], norm[2])
         cutter = vtk.vtkCutter()
         cutter.SetCutFunction(plane)
-        if tag_id:
-            cutter.SetInputDataObject(thresh.GetOutput())
+        if len(values) == 1:
+            plane.SetOrigin(values[0] * norm[0], values[0] * norm[1], values[0] * norm[2])
         else:
-            cutter.SetInputDataObject(self.grid)
+            plane.SetOrigin(0., 0., 0.)
+            cutter.SetNumberOfContours(len(values))
+            for i, v in enumerate(values):
+                cutter.SetValue(i, v)
+            cutter.GenerateCutScalarsOn()
+        cutter.SetInputDataObject(dataset)
         cutter.Update()
-        self.slice = cutter.GetOutput()
+        if len(values) == 1:
+            return [cutter.GetOutput()]
+        with _stage(self.profiler, 'Cutter.split'):
+            return self.__split(cutter.GetOutput(), values)
+
+    def __build_index(self, dataset, norm):
+        """Compute the extent of the cells of a grid along a direction, sorted by lower bound
+
+        Parameters:
+        dataset: vtkUnstructuredGrid
+            object containing grid and data
+        norm: ndarray
+            unit vector of the direction
+        """
+        dist = vtk_to_numpy(dataset.GetPoints().GetData()) @ norm
+        cells = dataset.GetCells()
+        offsets = vtk_to_numpy(cells.GetOffsetsArray())
+        cdist = dist[vtk_to_numpy(cells.GetConnectivityArray())]
+        cmin = np.minimum.reduceat(cdist, offsets[:-1])
+        cmax = np.maximum.reduceat(cdist, offsets[:-1])
+        order = np.argsort(cmin, kind='stable')
+        tol = 1e-12 * max(1., np.max(np.abs(dist)))
+        return order, cmin[order], cmax[order], np.max(cmax - cmin), tol
+
+    def __split(self, poly, values):
+        """Split the output of a multi-valued cutter into one object per cutplane
+
+        Parameters:
+        poly: vtkPolyData
+            object containing grid and data in all cutplanes, with cut scalars
+        values: ndarray
+            sorted values of the plane function defining the cutplanes
+        """
+        # Get the cutplane of each point, line and polygon
+        n_pts = poly.GetNumberOfPoints()
+        if n_pts > 0:
+            pts = vtk_to_numpy(poly.GetPoints().GetData())
+            scalars = vtk_to_numpy(poly.GetPointData().GetScalars())
+            pt_cut = np.clip(np.searchsorted(values, scalars), 1, max(len(values) - 1, 1))
+            pt_cut -= np.abs(scalars - values[pt_cut - 1]) <= np.abs(values[np.minimum(pt_cut, len(values) - 1)] - scalars)
+        else:
+            pts = np.zeros((0, 3))
+            pt_cut = np.zeros(0, dtype=np.int64)
+        cells = []
+        for _cells in [poly.GetLines(), poly.GetPolys()]:
+            if _cells.GetNumberOfCells() > 0:
+                offsets = vtk_to_numpy(_cells.GetOffsetsArray()).astype(np.int64)
+                conn = vtk_to_numpy(_cells.GetConnectivityArray()).astype(np.int64)
+            else:
+                offsets = np.zeros(1, dtype=np.int64)
+                conn = np.zeros(0, dtype=np.int64)
+            cells.append((offsets, conn, pt_cut[conn[offsets[:-1]]]))
+        cell_cut = np.concatenate([c[2] for c in cells])
+        # Number the points from 0 in each cutplane
+        pt_order = np.argsort(pt_cut, kind='stable')
+        pt_bounds = np.searchsorted(pt_cut[pt_order], np.arange(len(values) + 1))
+        new_ids = np.zeros(n_pts, dtype=np.int64)
+        new_ids[pt_order] = np.arange(n_pts) - pt_bounds[pt_cut[pt_order]]
+        # Build the cutplanes
+        slices = []
+        for k in range(len(values)):
+            _slice = vtk.vtkPolyData()
+            ids = pt_order[pt_bounds[k]:pt_bounds[k + 1]]
+            _pts = vtk.vtkPoints()
+            _pts.SetData(numpy_to_vtk(pts[ids], deep=1))
+            _slice.SetPoints(_pts)
+            for j, (offsets, conn, cut) in enumerate(cells):
+                sel = np.flatnonzero(cut == k)
+                sizes = offsets[sel + 1] - offsets[sel]
+                idx = np.repeat(offsets[sel] - np.concatenate(([0], np.cumsum(sizes)[:-1])), sizes) + np.arange(sizes.sum())
+                _cells = vtk.vtkCellArray()
+                _cells.SetData(numpy_to_vtkIdTypeArray(np.concatenate(([0], np.cumsum(sizes))), deep=1), numpy_to_vtkIdTypeArray(new_ids[conn[idx]], deep=1))
+                if j == 0:
+                    _slice.SetLines(_cells)
+                else:
+                    _slice.SetPolys(_cells)
+            self.__copy_data(poly.GetPointData(), _slice.GetPointData(), ids)
+            self.__copy_data(poly.GetCellData(), _slice.GetCellData(), np.flatnonzero(cell_cut == k))
+            slices.append(_slice)
+        return slices
+
+    def __copy_data(self, src, dst, ids):
+        """Copy a subset of named data arrays
 
-    def extract(self, var_names, tag_dim, at_point=True, sort=True):
+        Parameters:
+        src: vtkDataSetAttributes
+            source data
+        dst: vtkDataSetAttributes
+            destination data
+        ids: ndarray
+            indices of the tuples to copy
+        """
+        for i in range(src.GetNumberOfArrays()):
+            _vals = src.GetArray(i)
+            if _vals is None or _vals.GetName() is None:
+                continue
+            vals = numpy_to_vtk(vtk_to_numpy(_vals).reshape(-1, _vals.GetNumberOfComponents())[ids], deep=1)
+            vals.SetName(_vals.GetName())
+            dst.AddArray(vals)
+
+    def extract(self, var_names, tag_dim, at_point=True, sort=True, copy=False, slice_id=None):
         """Extract points, connectivity list and data from cutting plane
 
         Parameters:
@@ -129,45 +741,69 @@ class Cutter:
             whether data are defined at points (True) or at cells (default: True)
         sort: bool
             whether data must be sorted or not (default: True)
+        copy: bool
+            whether to return copies of the data (True) or views on the VTK buffers (default: False)
+        slice_id: int
+            index of the cutplane created by cut_many to extract from (default: None, extract from the cutplane created by cut)
+
+        Note:
+        Unless copy=True or sort=True, the returned arrays share the memory of the current slice and must not be modified.
         """
-        # Transfer point coordinates
-        _pts = self.slice.GetPoints()
-        pts = np.zeros((_pts.GetNumberOfPoints(), 3))
-        for i in range(0, pts.shape[0]):
-            for j in range(0, 3):
-                pts[i][j] = _pts.GetPoint(i)[j]
-        # Transfer connectivity
-        if tag_dim == 3:
-            _elems = self.slice.GetPolys().GetData()
-            nV = 3 # assumes that all Poly(gon)s are triangles
-        elif tag_dim == 2:
-            _elems = self.slice.GetLines().GetData()
-            nV = 2
-        else:
-            raise RuntimeError(f'tag_dim can only be 2 or 3 but {tag_dim} was given!\n')
-        elems = np.zeros((_elems.GetNumberOfTuples() // (nV + 1), nV), dtype=int)
-        for i in range(0, elems.shape[0]):
-                for j in range(0, nV):
-                    elems[i][j] = _elems.GetTuple((nV + 1) * i + j + 1)[0]
-        # Transfer variables
-        vals = {}
-        for name in var_names:
-            if at_point: # data at points
-                _vals = self.slice.GetPointData().GetArray(name)
-            else: # data at elements
-                _vals = self.slice.GetCellData().GetArray(name)
-            vals[name] = np.zeros((_vals.GetNumberOfTuples(), _vals.GetNumberOfComponents()))
-            for i in range(0, vals[name].shape[0]):
-                for j in range(0, vals[name].shape[1]):
-                    vals[name][i,j] = _vals.GetTuple(i)[j]
+        _slice = self.slice if slice_id is None else self.slices[slice_id]
+        with _stage(self.profiler, 'Cutter.extract') as stage:
+            # Transfer point coordinates
+            if _slice.GetNumberOfPoints() > 0:
+                pts = self.__to_numpy(_slice.GetPoints().GetData(), copy)
+            else:
+                pts = np.zeros((0, 3))
+            # Transfer connectivity
+            if tag_dim == 3:
+                _elems = _slice.GetPolys()
+                nV = 3 # assumes that all Poly(gon)s are triangles
+            elif tag_dim == 2:
+                _elems = _slice.GetLines()
+                nV = 2
+            else:
+                raise RuntimeError(f'tag_dim can only be 2 or 3 but {tag_dim} was given!\n')
+            if np.any(np.diff(vtk_to_numpy(_elems.GetOffsetsArray())) != nV):
+                raise RuntimeError(f'all elements in cutplane must have {nV} vertices!\n')
+            elems = self.__to_numpy(_elems.GetConnectivityArray(), copy).reshape(-1, nV)
+            # Transfer variables
+            vals = {}
+            for name in var_names:
+                if at_point: # data at points
+                    _vals = _slice.GetPointData().GetArray(name)
+                else: # data at elements
+                    _vals = _slice.GetCellData().GetArray(name)
+                if _vals is None:
+                    raise RuntimeError(f'Variable {name} not found in cutplane!\n')
+                vals[name] = self.__to_numpy(_vals, copy).reshape(-1, _vals.GetNumberOfComponents())
+            stage.count(pts.shape[0], elems.shape[0])
         # sort the data
         if sort:
             if not at_point:
                 print('Sorting method not implemented for data defined at cell. Skipping sort!\n')
+            elif tag_dim != 2:
+                print('Sorting method not implemented for surface cutplanes. Skipping sort!\n')
             else:
-               pts, elems, vals = self.__sort(pts, elems, vals)
+                with _stage(self.profiler, 'Cutter.sort') as stage:
+                    pts, elems, vals = self.__sort(pts, elems, vals)
+                    stage.count(pts.shape[0], elems.shape[0])
         return pts, elems, vals
 
+    def __to_numpy(self, array, copy):
+        """Wrap a VTK array in a numpy array, or copy it
+
+        Parameters:
+        array: vtkDataArray
+            VTK array to transfer
+        copy: bool
+            whether to copy the data (True) or to return a view (False)
+        """
+        if copy:
+            return np.array(vtk_to_numpy(array))
+        return vtk_to_numpy(array)
+
     def __sort(self, pts, elems, vals):
         """Sort data points and values against line connectivity list
 
@@ -178,20 +814,325 @@ class Cutter:
             connectivity list
         vals: dict
             name-ndarray dictionnary of values
+
+        Returns:
+        pts, elems, vals: ndarray, ndarray, dict
+            sorted points, lines connecting consecutive sorted points and sorted values
         """
-        # store pts and vals in matrix
-        data = pts
-        for val in vals.values():
-            data = np.hstack((data, val))
-        # sort id vector
-        elems = elems[elems[:, 0].argsort(), :]
-        # sort data against elems
-        nextId = 0
-        for i in range(0, elems.shape[0]):
-            pts[i,:] = data[elems[nextId,1], :3]
-            col = 3
-            for val in vals.values():
-                val[i,:] = data[elems[nextId,1], col:col+val.shape[1]]
-                col = col + val.shape[1]
-            nextId = elems[nextId, 1]
+        order, elems, self.loops = _order(elems, pts)
+        pts = pts[order, :]
+        vals = {name: val[order, :] for name, val in vals.items()}
         return pts, elems, vals
+
+class PartitionedGrid:
+    """Grid made of pieces stored in separate files, created by Reader from a parallel VTK (.pvtu) or multiblock VTK (.vtm) file
+
+    The pieces are not kept in memory, they are read by Cutter each time they are cut.
+
+    Parameters:
+    fnames: array
+        names of the files of the pieces
+    names: array
+        names of the pieces, or None (default: None)
+    arrays: array
+        names of point and cell data to load (default: None, load all data)
+
+    Attributes:
+    fnames: list of str
+        names of the files of the pieces
+    names: list of str
+        names of the pieces
+    arrays: array
+        names of point and cell data to load
+    bounds: list of ndarray
+        bounding box (xmin, xmax, ymin, ymax, zmin, zmax) of each piece, or None until the piece has been read
+    """
+    def __init__(self, fnames, names=None, arrays=None):
+        self.fnames = list(fnames)
+        self.names = list(names) if names is not None else [None] * len(self.fnames)
+        self.arrays = arrays
+        self.bounds = [None] * len(self.fnames)
+
+    def __len__(self):
+        return len(self.fnames)
+
+def _is_partitioned(grid):
+    """Check whether a grid is made of several pieces (partitioned or multiblock grid)
+
+    Parameters:
+    grid: vtkDataObject or PartitionedGrid
+        object containing grid and data, or pieces of a partitioned file
+    """
+    return isinstance(grid, PartitionedGrid) or grid.IsA('vtkCompositeDataSet')
+
+def _leaves(grid):
+    """Get the datasets of a multiblock grid
+
+    Parameters:
+    grid: vtkCompositeDataSet
+        multiblock grid
+    """
+    leaves = []
+    it = grid.NewIterator()
+    it.InitTraversal()
+    while not it.IsDoneWithTraversal():
+        leaves.append(it.GetCurrentDataObject())
+        it.GoToNextItem()
+    return leaves
+
+def _crosses(bounds, norm, values):
+    """Check whether a bounding box crosses at least one of several parallel cutplanes
+
+    Parameters:
+    bounds: array
+        bounding box (xmin, xmax, ymin, ymax, zmin, zmax), or None if unknown
+    norm: ndarray
+        unit vector normal to cutplanes
+    values: ndarray
+        signed distances of the cutplanes from the global origin along the normal
+    """
+    if bounds is None:
+        return True
+    corners = np.array(np.meshgrid(bounds[0:2], bounds[2:4], bounds[4:6], indexing='ij')).reshape(3, -1).T
+    dist = corners @ norm
+    tol = 1e-12 * max(1., np.max(np.abs(dist)))
+    return bool(np.any((values >= dist.min() - tol) & (values <= dist.max() + tol)))
+
+def _cut_piece(fname, arrays, tag_name, tag_id, norm, values):
+    """Read a piece of a partitioned grid, without its ghost cells, and cut it
+
+    Parameters:
+    fname: str
+        name of the file of the piece
+    arrays: array
+        names of point and cell data to load
+    tag_name: str
+        name of variable to create threshold on
+    tag_id: int
+        ID number to threshold
+    norm: ndarray
+        unit vector normal to cutplanes
+    values: ndarray
+        signed distances of the cutplanes from the global origin along the normal
+
+    Returns:
+    bounds: ndarray
+        bounding box of the piece
+    slices: list of dict
+        name-ndarray dictionnary of grid and data in each cutplane, or None if the piece does not cross the cutplanes
+    """
+    reader = Reader()
+    reader.open(fname, arrays)
+    grid = reader.grid
+    ghost = vtk.vtkDataSetAttributes.GhostArrayName()
+    if grid.GetCellData().HasArray(ghost):
+        grid.RemoveGhostCells()
+    grid.GetCellData().RemoveArray(ghost)
+    grid.GetPointData().RemoveArray(ghost)
+    bounds = np.array(grid.GetBounds())
+    if not _crosses(bounds, norm, values):
+        return bounds, None
+    cutter = Cutter(grid)
+    cutter.cut_many(values, norm, tag_name, tag_id)
+    return bounds, [_poly_to_numpy(s) for s in cutter.slices]
+
+def _stitch(polys):
+    """Append the cutplanes of several pieces, merging their common points
+
+    Parameters:
+    polys: list of vtkPolyData
+        objects containing grid and data in the cutplane of each piece
+    """
+    polys = [poly for poly in polys if poly.GetNumberOfPoints() > 0] # empty cutplanes may not have data arrays
+    if len(polys) == 0:
+        return vtk.vtkPolyData()
+    if len(polys) == 1:
+        return polys[0]
+    append = vtk.vtkAppendPolyData()
+    for poly in polys:
+        append.AddInputData(poly)
+    clean = vtk.vtkStaticCleanPolyData()
+    clean.SetInputConnection(append.GetOutputPort())
+    clean.SetTolerance(1e-12) # relative to the size of the cutplane
+    clean.ConvertLinesToPointsOff()
+    clean.ConvertPolysToLinesOff()
+    clean.ConvertStripsToPolysOff()
+    clean.Update()
+    return clean.GetOutput()
+
+def _poly_to_numpy(poly):
+    """Get the numpy arrays defining a cutplane and its data
+
+    Parameters:
+    poly: vtkPolyData
+        object containing grid and data in cutplane
+
+    Returns:
+    arrays: dict
+        name-ndarray dictionnary of points, offsets and connectivity of lines and polygons prefixed by lines/ and polys/, and point and cell data prefixed by point/ and cell/
+    """
+    data = {'points': np.array(vtk_to_numpy(poly.GetPoints().GetData())) if poly.GetNumberOfPoints() > 0 else np.zeros((0, 3))}
+    for prefix, cells in [('lines/', poly.GetLines()), ('polys/', poly.GetPolys())]:
+        if cells.GetNumberOfCells() > 0:
+            data[prefix + 'offsets'] = vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64)
+            data[prefix + 'connectivity'] = vtk_to_numpy(cells.GetConnectivityArray()).astype(np.int64)
+        else:
+            data[prefix + 'offsets'] = np.zeros(1, dtype=np.int64)
+            data[prefix + 'connectivity'] = np.zeros(0, dtype=np.int64)
+    for prefix, _data in [('point/', poly.GetPointData()), ('cell/', poly.GetCellData())]:
+        for i in range(_data.GetNumberOfArrays()):
+            name = _data.GetArrayName(i)
+            if name is not None and _data.GetArray(i) is not None:
+                data[prefix + name] = np.array(vtk_to_numpy(_data.GetArray(i)))
+    return data
+
+def _numpy_to_poly(data):
+    """Build a cutplane from numpy arrays
+
+    Parameters:
+    data: dict
+        name-ndarray dictionnary of cutplane and data, as given by _poly_to_numpy
+    """
+    poly = vtk.vtkPolyData()
+    pts = vtk.vtkPoints()
+    pts.SetData(numpy_to_vtk(data['points'], deep=1))
+    poly.SetPoints(pts)
+    for prefix in ['lines/', 'polys/']:
+        cells = vtk.vtkCellArray()
+        cells.SetData(numpy_to_vtkIdTypeArray(data[prefix + 'offsets'], deep=1), numpy_to_vtkIdTypeArray(data[prefix + 'connectivity'], deep=1))
+        if prefix == 'lines/':
+            poly.SetLines(cells)
+        else:
+            poly.SetPolys(cells)
+    for key, array in data.items():
+        prefix, _, name = key.partition('/')
+        if prefix in ['point', 'cell']:
+            vals = numpy_to_vtk(array, deep=1)
+            vals.SetName(name)
+            if prefix == 'point':
+                poly.GetPointData().AddArray(vals)
+            else:
+                poly.GetCellData().AddArray(vals)
+    return poly
+
+def _cell_dimension(cell_type):
+    """Get the topological dimension of a type of VTK cell
+
+    Parameters:
+    cell_type: int
+        VTK type of cell
+    """
+    return getattr(vtk, 'vtkCellTypeUtilities', vtk.vtkCellTypes).GetDimension(int(cell_type)) # vtkCellTypes before VTK 9.6
+
+def _candidates(index, lower, upper, count=False):
+    """Get the cells whose extent along the direction of an index intersects a range of values
+
+    Parameters:
+    index: tuple
+        sorting order, sorted lower and upper bounds, largest width of the extents of the cells, and tolerance
+    lower: float
+        lower bound of the range of signed distances from the global origin along the direction
+    upper: float
+        upper bound of the range of signed distances from the global origin along the direction
+    count: bool
+        whether to return an upper bound of the number of cells instead of the cells (default: False)
+    """
+    order, cmin, cmax, width, tol = index
+    lo = np.searchsorted(cmin, lower - width - tol, side='left')
+    hi = np.searchsorted(cmin, upper + tol, side='right')
+    if count:
+        return hi - lo
+    return order[lo:hi][cmax[lo:hi] >= lower - tol]
+
+def _extract_cells(data, ids, new_ids):
+    """Get the numpy arrays defining a subset of the cells of a grid and their data
+
+    Parameters:
+    data: dict
+        name-ndarray dictionnary of grid and data, as given by _grid_to_numpy
+    ids: ndarray
+        sorted indices of the cells
+    new_ids: ndarray
+        work array of the size of the number of points of the grid
+
+    Returns:
+    arrays: dict
+        name-ndarray dictionnary of grid and data of the cells, with the points used by the cells only
+    """
+    offsets = data['offsets']
+    sizes = offsets[ids + 1] - offsets[ids]
+    sub_offsets = np.concatenate(([0], np.cumsum(sizes)))
+    conn = data['connectivity'][np.repeat(offsets[ids] - sub_offsets[:-1], sizes) + np.arange(sub_offsets[-1])]
+    used = np.zeros(len(data['points']), dtype=bool)
+    used[conn] = True
+    pts = np.flatnonzero(used)
+    new_ids[pts] = np.arange(len(pts))
+    sub = {'points': data['points'][pts], 'offsets': sub_offsets, 'connectivity': new_ids[conn], 'types': data['types'][ids]}
+    for key, array in data.items():
+        if key.startswith('point/'):
+            sub[key] = array[pts]
+        elif key.startswith('cell/'):
+            sub[key] = array[ids]
+    return sub
+
+def _grid_to_numpy(grid, arrays=None):
+    """Get the numpy arrays defining a grid and its data
+
+    Parameters:
+    grid: vtkDataObject
+        object containing grid and data
+    arrays: array
+        names of point and cell data to get (default: None, get all data)
+
+    Returns:
+    arrays: dict
+        name-ndarray dictionnary of points, offsets, connectivity, cell types, and point and cell data prefixed by point/ and cell/
+    """
+    if not grid.IsA('vtkUnstructuredGrid'):
+        append = vtk.vtkAppendFilter()
+        append.SetInputDataObject(grid)
+        append.Update()
+        grid = append.GetOutput()
+    cells = grid.GetCells()
+    types = vtk.vtkUnsignedCharArray()
+    try:
+        types.DeepCopy(grid.GetCellTypes()) # VTK >= 9.6, cell types may be stored in an implicit array
+    except TypeError:
+        types.DeepCopy(grid.GetCellTypesArray())
+    data = {
+        'points': vtk_to_numpy(grid.GetPoints().GetData()) if grid.GetPoints() else np.zeros((0, 3)),
+        'offsets': vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64, copy=False),
+        'connectivity': vtk_to_numpy(cells.GetConnectivityArray()).astype(np.int64, copy=False),
+        'types': vtk_to_numpy(types)
+    }
+    for prefix, _data in [('point/', grid.GetPointData()), ('cell/', grid.GetCellData())]:
+        for i in range(_data.GetNumberOfArrays()):
+            name = _data.GetArrayName(i)
+            if name is not None and _data.GetArray(i) is not None and (arrays is None or name in arrays):
+                data[prefix + name] = vtk_to_numpy(_data.GetArray(i))
+    return data
+
+def _numpy_to_grid(data):
+    """Build a grid wrapping numpy arrays without copying them
+
+    Parameters:
+    data: dict
+        name-ndarray dictionnary of grid and data, as given by _grid_to_numpy
+    """
+    grid = vtk.vtkUnstructuredGrid()
+    pts = vtk.vtkPoints()
+    pts.SetData(numpy_to_vtk(data['points'], deep=0))
+    grid.SetPoints(pts)
+    cells = vtk.vtkCellArray()
+    cells.SetData(numpy_to_vtkIdTypeArray(data['offsets'], deep=0), numpy_to_vtkIdTypeArray(data['connectivity'], deep=0))
+    grid.SetCells(numpy_to_vtk(data['types'], deep=0, array_type=vtk.VTK_UNSIGNED_CHAR), cells)
+    for key, array in data.items():
+        prefix, _, name = key.partition('/')
+        if prefix in ['point', 'cell']:
+            vals = numpy_to_vtk(array, deep=0)
+            vals.SetName(name)
+            if prefix == 'point':
+                grid.GetPointData().AddArray(vals)
+            else:
+                grid.GetCellData().AddArray(vals)
+    return grid
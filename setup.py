@@ -31,5 +31,6 @@ setup(
     license='Apache License, Version 2.0',
     packages=find_packages(include=['pycfdutils*']),
     install_requires=['numpy>=1.22', 'vtk>=9.2.2'],
+    entry_points={'console_scripts': ['pycfdutils-jobs = pycfdutils.jobs:main']},
     classifiers=['Operating System :: OS Independent', 'Programming Language :: Python'],
 )
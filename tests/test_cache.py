@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import numpy as np
+from pycfdutils import meshes
+from pycfdutils.cache import GridCache
+from pycfdutils.vtk_utils import Reader, _grid_to_numpy
+
+def _write(tmp_path, name, n_cells=500):
+    """Write a synthetic wing to a VTK file
+    """
+    fname = str(tmp_path / f'{name}.vtu')
+    meshes.write(meshes.surface(n_cells), fname)
+    return fname
+
+def _entries(cache):
+    """List the entries of a cache
+    """
+    return [e for e in os.listdir(cache.directory) if not e.startswith('.tmp')]
+
+def test_load(tmp_path):
+    # The stored arrays are memory-mapped back, for the same file and the same selection only
+    fname = _write(tmp_path, 'wing')
+    cache = GridCache(str(tmp_path / 'cache'))
+    data = _grid_to_numpy(meshes.surface(500))
+    assert cache.load(fname, ['Cp']) is None
+    cache.store(fname, data, ['Cp'])
+    loaded = cache.load(fname, ['Cp'])
+    assert sorted(loaded) == sorted(data)
+    for name in data:
+        assert isinstance(loaded[name], np.memmap)
+        np.testing.assert_array_equal(loaded[name], data[name])
+    assert cache.load(fname, ['Cp'], [0]) is None
+    assert cache.load(fname, ['Cp', 'tag']) is None
+    assert cache.load(fname) is None
+    # The entry is invalidated when the file is modified, and replaced by the next one
+    stat = os.stat(fname)
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.load(fname, ['Cp']) is None
+    cache.store(fname, data, ['Cp'])
+    assert cache.load(fname, ['Cp']) is not None
+    assert len(_entries(cache)) == 1
+    cache.clear()
+    assert _entries(cache) == [] and cache.load(fname, ['Cp']) is None
+
+def test_eviction(tmp_path):
+    fnames = [_write(tmp_path, f'wing_{i}') for i in range(3)]
+    data = _grid_to_numpy(meshes.surface(500))
+    size = sum(np.ascontiguousarray(a).nbytes for a in data.values())
+    # The cache holds two entries, and the least recently used one is evicted when a third one is stored
+    cache = GridCache(str(tmp_path / 'cache'), max_size=int(2.5 * size))
+    for fname in fnames[:2]:
+        cache.store(fname, data)
+        time.sleep(0.01)
+    assert cache.load(fnames[0]) is not None
+    time.sleep(0.01)
+    cache.store(fnames[2], data)
+    assert len(_entries(cache)) == 2
+    assert cache.load(fnames[1]) is None
+    assert cache.load(fnames[0]) is not None and cache.load(fnames[2]) is not None
+
+def test_reader(tmp_path):
+    # The grids read through the cache are the same as the grids read from the files
+    fname = _write(tmp_path, 'wing')
+    cache = GridCache(str(tmp_path / 'cache'))
+    ref = Reader()
+    ref.open(fname, ['Cp', 'tag'])
+    ref = _grid_to_numpy(ref.grid)
+    for _ in range(2):
+        reader = Reader(cache)
+        reader.open(fname, ['Cp', 'tag'])
+        data = _grid_to_numpy(reader.grid)
+        assert sorted(data) == sorted(ref)
+        for name in ref:
+            np.testing.assert_array_equal(data[name], ref[name])
+    assert len(_entries(cache)) == 1
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cross_sections import CrossSections, CrossSectionsFile
+from pycfdutils.parallel import _slice
+from pycfdutils.vtk_utils import Cutter
+
+@pytest.fixture(scope='module')
+def sections():
+    return _slice(Cutter(meshes.surface(20000)), np.linspace(0.003, 0.993, 30), 'Cp', 'tag', 5)
+
+def _loop_loads(loads, aoa):
+    """Integrate the pressure coefficient of each section panel by panel, as before the batched integration
+    """
+    aoa = np.deg2rad(aoa)
+    cls, cms, cds = [], [], []
+    for i in range(len(loads.y_sec)):
+        xc = loads.xz_c[i][:, 0]
+        zc = loads.xz_c[i][:, 1]
+        cp = loads.cp[i][:, 0]
+        cz = 0
+        cx = 0
+        cm = 0
+        for j in range(len(xc) - 1):
+            dx = xc[j + 1] - xc[j]
+            dz = -(zc[j + 1] - zc[j])
+            cz -= 0.5 * dx * (cp[j + 1] + cp[j])
+            cx -= 0.5 * dz * (cp[j + 1] + cp[j])
+            cm -= -0.5 * (cp[j + 1] * (xc[j + 1] - 0.25) + cp[j] * (xc[j] - 0.25)) * dx + 0.5 * (cp[j + 1] * zc[j + 1] + cp[j] * zc[j]) * dz
+        cls.append(cz * np.cos(aoa) - cx * np.sin(aoa))
+        cms.append(cm)
+        cds.append(cz * np.sin(aoa) + cx * np.cos(aoa))
+    return np.array(cls), np.array(cms), np.array(cds)
+
+def test_compute_loads(sections):
+    # Integrate the sections by batches, while they are added
+    loads = CrossSections()
+    for i, (y, xz, cp) in enumerate(sections):
+        loads.add_section(y, xz, cp)
+        if i % 7 == 0:
+            loads.compute_loads(2.)
+    loads.compute_loads(2.)
+    for a, b in zip((loads.cl, loads.cm, loads.cd), _loop_loads(loads, 2.)):
+        np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+    # Several angles of attack at once
+    cl, cm, cd = loads.compute_loads([0., 2., 4.])
+    assert cl.shape == (3, len(sections))
+    for j, aoa in enumerate([0., 2., 4.]):
+        for a, b in zip((cl[j], cm[j], cd[j]), _loop_loads(loads, aoa)):
+            np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+
+def test_compute_totals(sections):
+    loads = CrossSections()
+    for y, xz, cp in sections:
+        loads.add_section(y, xz, cp)
+    loads.compute_loads(2.)
+    cl, _, cd = loads.compute_totals(s_ref=1.)
+    y = np.asarray(loads.y_sec)
+    c = np.asarray(loads.chords)
+    assert cl == pytest.approx(np.sum(0.5 * (loads.cl[1:] * c[1:] + loads.cl[:-1] * c[:-1]) * np.diff(y)), rel=1e-12)
+    assert cd == pytest.approx(np.sum(0.5 * (loads.cd[1:] * c[1:] + loads.cd[:-1] * c[:-1]) * np.diff(y)), rel=1e-12)
+
+def test_resample(sections):
+    loads = CrossSections()
+    for y, xz, cp in sections:
+        loads.add_section(y, xz, cp)
+    x_c, cp_upper, cp_lower = loads.resample(n_points=51)
+    # Split each loop at the leading and trailing edges and interpolate each surface separately
+    for i in range(len(loads)):
+        x, z = loads.xz_c[i][:, 0], loads.xz_c[i][:, 1]
+        cp = loads.cp[i][:, 0]
+        n = len(x)
+        ile, ite = np.argmin(x), np.argmax(x)
+        loop = np.roll(np.arange(n), -ile)
+        k = (ite - ile) % n
+        surfs = [loop[:k + 1], np.concatenate(([loop[0]], loop[k:][::-1]))]
+        if z[surfs[0]].mean() < z[surfs[1]].mean():
+            surfs = surfs[::-1]
+        for ids, vals in zip(surfs, (cp_upper[i], cp_lower[i])):
+            order = np.argsort(x[ids], kind='stable')
+            np.testing.assert_allclose(vals, np.interp(x_c, x[ids][order], cp[ids][order]), rtol=0, atol=1e-12)
+
+def _assert_equal(loads, ref):
+    """Check that two sets of cross-sections and their loads are equal
+    """
+    assert len(loads) == len(ref)
+    for name in ['y_sec', 'chords', 'xz_le', 'offsets', 'cl', 'cm', 'cd']:
+        np.testing.assert_array_equal(getattr(loads, name), getattr(ref, name))
+    for a, b in zip(loads.xz_c, ref.xz_c):
+        np.testing.assert_array_equal(a, b)
+    for a, b in zip(loads.cp, ref.cp):
+        np.testing.assert_array_equal(a, b)
+
+@pytest.mark.parametrize('background', [False, True])
+def test_write_binary(sections, tmp_path, background):
+    loads = CrossSections()
+    for y, xz, cp in sections[:-1]:
+        loads.add_section(y, xz, cp)
+    loads.compute_loads(2.)
+    future = loads.write(binary=True, fname='wing.bin', background=background, dirname=str(tmp_path))
+    if background:
+        # The sections added while writing are not written
+        written = loads.__getstate__()
+        loads.add_section(*sections[-1])
+        future.result()
+        loads = CrossSections()
+        loads._set_arrays(written)
+    else:
+        assert future is None
+    # The data are read back as written, section by section or at once
+    data = CrossSectionsFile(str(tmp_path / 'wing.bin'))
+    assert len(data) == len(loads)
+    for name in ['y_sec', 'chords', 'xz_le', 'offsets', 'cl', 'cm', 'cd']:
+        np.testing.assert_array_equal(getattr(data, name), getattr(loads, name))
+    for i in range(len(loads)):
+        xz_c, cp = data.get_section(i)
+        np.testing.assert_array_equal(xz_c, loads.xz_c[i])
+        np.testing.assert_array_equal(cp, loads.cp[i])
+    copy = data.load()
+    _assert_equal(copy, loads)
+    # The sections added to the loaded data are not written to the file
+    copy.add_section(*sections[-1])
+    assert len(copy) == len(loads) + 1 and len(CrossSectionsFile(str(tmp_path / 'wing.bin'))) == len(loads)
+    np.testing.assert_array_equal(copy.xz_c[0], loads.xz_c[0])
+
+def test_write_text(sections, tmp_path):
+    loads = CrossSections()
+    for y, xz, cp in sections[:3]:
+        loads.add_section(y, xz, cp)
+    loads.compute_loads(2.)
+    assert loads.write(dirname=str(tmp_path)) is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['loads.dat', 'slice_0.dat', 'slice_1.dat', 'slice_2.dat']
+    data = np.loadtxt(tmp_path / 'loads.dat', delimiter=',')
+    np.testing.assert_allclose(data, np.column_stack((loads.y_sec, loads.cl, loads.cm, loads.cd)), rtol=1e-4, atol=1e-8)
+    data = np.loadtxt(tmp_path / 'slice_1.dat', delimiter=',')
+    np.testing.assert_allclose(data, np.hstack((loads.xz_c[1], loads.cp[1])), rtol=1e-4, atol=1e-8)
+    # Other files are not read as cross-sections
+    with pytest.raises(RuntimeError):
+        CrossSectionsFile(str(tmp_path / 'loads.dat'))
+
+def test_storage(sections):
+    # The points of all the sections are stored in flat arrays, indexed by the offsets of the sections
+    loads = CrossSections()
+    views = []
+    for y, xz, cp in sections:
+        loads.add_section(y, xz, cp)
+        views.append((loads.xz_c[-1], loads.cp[-1]))
+    n_pts = [len(xz) for _, xz, _ in sections]
+    assert sum(n_pts) > 1024 and len(sections) > 16 # the capacity of the arrays has been doubled
+    np.testing.assert_array_equal(loads.offsets, np.concatenate(([0], np.cumsum(n_pts))))
+    assert loads.offsets.dtype == np.int64 and len(loads.xz_c) == len(loads.cp) == len(sections)
+    for i, (y, xz, cp) in enumerate(sections):
+        ile = np.argmin(xz[:, 0])
+        c = xz[:, 0].max() - xz[:, 0].min()
+        np.testing.assert_allclose(loads.xz_c[i], (xz - xz[ile]) / c, rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(loads.cp[i], cp.reshape(-1, 1))
+        assert loads.y_sec[i] == y and loads.chords[i] == c
+        # The views taken before the arrays were grown keep their data
+        np.testing.assert_array_equal(views[i][0], loads.xz_c[i])
+        np.testing.assert_array_equal(views[i][1], loads.cp[i])
+    assert loads.xz_c[0].base is loads.xz_c[-1].base is not None
+    np.testing.assert_array_equal(loads.xz_c[-2], loads.xz_c[len(sections) - 2])
+    assert len(loads.xz_c[1:4]) == 3
+    with pytest.raises(IndexError):
+        loads.xz_c[len(sections)]
+    # Only the used part of the arrays is pickled
+    loads.compute_loads(2.)
+    state = loads.__getstate__()
+    assert len(state['y_sec']) == len(sections) and len(state['xz_c']) == len(state['cp']) == sum(n_pts)
+    _assert_equal(pickle.loads(pickle.dumps(loads)), loads)
+
+def test_components(sections):
+    # The pressure coefficients can have several components, the same for all the sections
+    loads = CrossSections()
+    for y, xz, cp in sections[:3]:
+        loads.add_section(y, xz, np.column_stack((cp, 2 * cp)))
+    assert loads.cp[2].shape == (len(sections[2][1]), 2)
+    with pytest.raises(RuntimeError):
+        loads.add_section(*sections[3])
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+import numpy as np
+from pycfdutils import meshes
+from pycfdutils.vtk_utils import _grid_to_numpy
+
+def _run(code, tmp_path):
+    """Run code in a new interpreter and return its standard output
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.environ.get('PYTHONPATH', '')]))
+    return subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True).stdout
+
+def test_lazy_vtk(tmp_path):
+    # The grids loaded from the cache are cut and integrated without importing VTK
+    np.savez(tmp_path / 'wing.npz', **{name.replace('/', ':'): a for name, a in _grid_to_numpy(meshes.surface(2000)).items()})
+    out = _run('''
+import sys
+import numpy as np
+import pycfdutils
+data = {name.replace(':', '/'): a for name, a in np.load('wing.npz').items()}
+cutter = pycfdutils.NumpyCutter(data)
+loads = pycfdutils.CrossSections()
+for y in [0.25, 0.75]:
+    cutter.cut([0., y, 0.], [0., 1., 0.], 'tag', 5)
+    pts, _, vals = cutter.extract(['Cp'], 2)
+    loads.add_section(y, pts[:, [0, 2]], vals['Cp'])
+cl, _, _ = loads.compute_loads(2.)
+print(all(cl > 0), any(m == 'vtk' or m.startswith('vtkmodules') for m in sys.modules))
+# Only the VTK modules used by the package are imported on first use
+pycfdutils.vtk_utils.vtk.vtkPoints()
+print('vtk' in sys.modules, 'vtkmodules.vtkCommonCore' in sys.modules)
+''', tmp_path)
+    assert out.split() == ['True', 'False', 'False', 'True']
+
+def test_missing_vtk(tmp_path):
+    # The package is imported without VTK, which is required only when used
+    out = _run('''
+import sys
+sys.modules['vtkmodules'] = sys.modules['vtk'] = None
+import pycfdutils
+pycfdutils.CrossSections()
+try:
+    pycfdutils.vtk_utils.vtk.vtkPoints()
+except RuntimeError as e:
+    print(str(e).strip())
+''', tmp_path)
+    assert out.strip() == 'VTK not found!'
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cross_sections import CrossSections, CrossSectionsFile
+from pycfdutils.jobs import JobRunner
+from pycfdutils.parallel import _slice
+from pycfdutils.vtk_utils import Cutter
+
+CUTS = [0.103, 0.503, 0.903]
+
+def _write_job(tmp_path, aoa=2.):
+    """Write a job with two cases and a case whose cutplanes do not cross the grid, for solution files written a minute ago
+    """
+    grid = meshes.surface(2000)
+    for name in ['wing_a', 'wing_b']:
+        meshes.write(grid, str(tmp_path / f'{name}.vtu'))
+        stat = os.stat(tmp_path / f'{name}.vtu')
+        os.utime(tmp_path / f'{name}.vtu', ns=(stat.st_atime_ns, stat.st_mtime_ns - 60 * 10**9))
+    job = {'Defaults': {'Cuts': CUTS, 'Tag': ['tag', 5], 'Variable': 'Cp', 'AoA': aoa},
+           'Cases': [{'File': 'wing_a.vtu'}, {'File': 'wing_b.vtu', 'Binary': True}, {'Name': 'tip', 'File': 'wing_a.vtu', 'Cuts': [1.5]}]}
+    fname = str(tmp_path / 'job.json')
+    with open(fname, 'w') as f:
+        json.dump(job, f)
+    return fname, grid
+
+def _status(runner, **kwargs):
+    return [r['status'] for r in runner.run(**kwargs)]
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_run(tmp_path, n_workers):
+    fname, grid = _write_job(tmp_path)
+    runner = JobRunner(fname, str(tmp_path / 'workspace'), n_workers)
+    assert _status(runner) == ['done', 'done', 'failed']
+    assert 'does not cross the grid' in runner.results[2]['error']
+    assert 'Reader.open' in runner.results[0]['stages']
+    assert len(runner.summary().splitlines()) == 4
+    # The outputs of the cases are the loads of the slices of their grid
+    ref = CrossSections()
+    for y, xz, cp in _slice(Cutter(grid), CUTS, 'Cp', 'tag', 5):
+        ref.add_section(y, xz, cp)
+    ref.compute_loads(2.)
+    data = CrossSectionsFile(str(tmp_path / 'workspace' / 'wing_b' / 'sections.bin'))
+    for name in ['y_sec', 'cl', 'cm', 'cd']:
+        np.testing.assert_allclose(getattr(data, name), getattr(ref, name), rtol=0, atol=1e-12)
+    loads = np.loadtxt(tmp_path / 'workspace' / 'wing_a' / 'loads.dat', delimiter=',')
+    np.testing.assert_allclose(loads[:, 1], ref.cl, rtol=1e-4)
+    for i in range(len(CUTS)):
+        assert os.path.isfile(tmp_path / 'workspace' / 'wing_a' / f'slice_{i}.dat')
+
+def test_skip(tmp_path):
+    fname, _ = _write_job(tmp_path)
+    output = str(tmp_path / 'workspace')
+    runner = JobRunner(fname, output, 1)
+    assert _status(runner) == ['done', 'done', 'failed']
+    # The computed cases are skipped, unless they are forced
+    assert _status(runner) == ['skipped', 'skipped', 'failed']
+    assert runner.summary().splitlines()[1].split()[-1] == '-'
+    assert _status(runner, force=True) == ['done', 'done', 'failed']
+    # The cases are computed again when their file is modified
+    os.utime(tmp_path / 'wing_a.vtu')
+    assert _status(runner) == ['done', 'skipped', 'failed']
+    # ...when one of their outputs is missing
+    os.remove(tmp_path / 'workspace' / 'wing_b' / 'sections.bin')
+    assert _status(runner) == ['skipped', 'done', 'failed']
+    # ...or when their inputs change
+    fname, _ = _write_job(tmp_path, aoa=4.)
+    assert _status(JobRunner(fname, output, 1)) == ['done', 'done', 'failed']
+
+def test_parse(tmp_path):
+    # The cases must have a file, cutplanes and a variable, and different names
+    fname = str(tmp_path / 'job.json')
+    for cases in [[{'File': 'wing.vtu', 'Cuts': CUTS}], [{'File': 'wing.vtu', 'Cuts': CUTS, 'Variable': 'Cp'}] * 2]:
+        with open(fname, 'w') as f:
+            json.dump({'Cases': cases}, f)
+        with pytest.raises(RuntimeError):
+            JobRunner(fname)
+    with pytest.raises(RuntimeError):
+        JobRunner(str(tmp_path / 'missing.json'))
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cache import GridCache
+from pycfdutils.parallel import SpanwiseSlicer, BatchSlicer
+from pycfdutils.vtk_utils import Reader
+
+Y_CUTS = np.linspace(0.003, 0.993, 9)
+
+@pytest.fixture(scope='module')
+def surface():
+    return meshes.surface(5000)
+
+def _assert_equal(loads, ref):
+    """Check that two sets of cross-sections are equal
+    """
+    assert len(loads) == len(ref)
+    for name in ['y_sec', 'chords', 'xz_le', 'offsets']:
+        np.testing.assert_array_equal(getattr(loads, name), getattr(ref, name))
+    for a, b in zip(loads.xz_c, ref.xz_c):
+        np.testing.assert_array_equal(a, b)
+    for a, b in zip(loads.cp, ref.cp):
+        np.testing.assert_array_equal(a, b)
+
+@pytest.mark.parametrize('backend', ['vtk', 'numpy'])
+def test_spanwise(surface, backend):
+    # The stations are shared by three processes, and their cross-sections are gathered in order
+    ref = SpanwiseSlicer(surface, 1, backend).slice(Y_CUTS, 'Cp', 'tag', 5)
+    loads = SpanwiseSlicer(surface, 3, backend).slice(Y_CUTS, 'Cp', 'tag', 5)
+    assert all(np.diff(ref.offsets) > 0)
+    _assert_equal(loads, ref)
+
+def test_batch(surface, tmp_path):
+    # Each file is sliced as a single grid would be, and the cross-sections are yielded in the order of the files
+    fnames = []
+    for i in range(3):
+        grid = meshes.surface(5000)
+        cp = grid.GetPointData().GetArray('Cp')
+        for j in range(cp.GetNumberOfTuples()):
+            cp.SetValue(j, (i + 1) * cp.GetValue(j))
+        fnames.append(str(tmp_path / f'wing_{i}.vtu'))
+        meshes.write(grid, fnames[-1])
+    refs = []
+    for fname, aoa in zip(fnames, [0., 2., 4.]):
+        reader = Reader()
+        reader.open(fname, ['Cp', 'tag'])
+        refs.append(SpanwiseSlicer(reader.grid, 1).slice(Y_CUTS, 'Cp', 'tag', 5))
+        refs[-1].compute_loads(aoa)
+    np.testing.assert_allclose(refs[1].cp[0], 2 * refs[0].cp[0], rtol=1e-12)
+    # The files are read once, then loaded from the cache
+    cache = GridCache(str(tmp_path / 'cache'))
+    for in_flight, n_workers in [(1, 1), (2, 2), (3, 1)]:
+        slicer = BatchSlicer(Y_CUTS, 'Cp', 'tag', 5, in_flight=in_flight, n_workers=n_workers, cache=cache)
+        results = list(slicer.run(fnames, [0., 2., 4.]))
+        assert len(results) == len(refs)
+        for loads, ref in zip(results, refs):
+            _assert_equal(loads, ref)
+            for name in ['cl', 'cm', 'cd']:
+                np.testing.assert_array_equal(getattr(loads, name), getattr(ref, name))
+    assert len(os.listdir(cache.directory)) == len(fnames)
+    # The error of a file that cannot be read is raised when the file is reached
+    slicer = BatchSlicer(Y_CUTS, 'Cp', 'tag', 5)
+    results = slicer.run([fnames[0], str(tmp_path / 'missing.vtu')])
+    _assert_equal(next(results), refs[0])
+    with pytest.raises(RuntimeError):
+        next(results)
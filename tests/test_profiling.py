@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cross_sections import CrossSections
+from pycfdutils.profiling import Profiler, _stage, _null_stage
+from pycfdutils.vtk_utils import Reader, Cutter
+
+def test_stages():
+    # The inner stages end first, and the outer stages include their time
+    calls = []
+    profiler = Profiler(callback=lambda *args: calls.append(args))
+    for i in range(2):
+        with profiler.stage('outer') as outer:
+            with profiler.stage('inner') as inner:
+                inner.count(10, 5)
+            outer.count(cells=i + 1)
+    with pytest.raises(ValueError):
+        with profiler.stage('error'):
+            raise ValueError
+    assert list(profiler.stages) == ['inner', 'outer', 'error']
+    assert [c[0] for c in calls] == ['inner', 'outer', 'inner', 'outer', 'error']
+    inner, outer = profiler.stages['inner'], profiler.stages['outer']
+    assert (inner['calls'], inner['points'], inner['cells'], inner['memory']) == (2, 20, 10, None)
+    assert (outer['calls'], outer['points'], outer['cells']) == (2, 0, 3)
+    assert outer['time'] >= inner['time'] > 0
+    assert all(c[4] is None for c in calls)
+    # The report has one line per stage
+    lines = profiler.summary().splitlines()
+    assert len(lines) == 4 and lines[0].split()[:2] == ['stage', 'calls']
+    assert lines[1].split()[:2] == ['inner', '2'] and lines[1].split()[-3:] == ['20', '10', '-']
+    profiler.reset()
+    assert len(profiler.stages) == 0
+
+def test_memory():
+    # The peak memory of a stage includes the memory of its inner stages
+    profiler = Profiler(memory=True)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            a = np.ones(2**23)
+        del a
+    assert profiler.stages['outer']['memory'] >= profiler.stages['inner']['memory'] >= 2**26
+
+def test_null_stage():
+    # Nothing is recorded without profiler
+    with _stage(None, 'stage') as stage:
+        stage.count(10, 5)
+    assert stage is _null_stage
+    profiler = Profiler()
+    with _stage(profiler, 'stage') as stage:
+        stage.count(10, 5)
+    assert profiler.stages['stage']['points'] == 10
+
+def test_processing(tmp_path):
+    # The stages of the reading, cutting and integration are recorded with the sizes of their outputs
+    fname = str(tmp_path / 'wing.vtu')
+    grid = meshes.surface(2000)
+    meshes.write(grid, fname)
+    profiler = Profiler()
+    reader = Reader(profiler=profiler)
+    reader.open(fname)
+    cutter = Cutter(reader.grid, profiler=profiler)
+    loads = CrossSections(profiler=profiler)
+    for y in [0.25, 0.75]:
+        cutter.cut([0., y, 0.], [0., 1., 0.], 'tag', 5)
+        pts, _, vals = cutter.extract(['Cp'], 2)
+        loads.add_section(y, pts[:, [0, 2]], vals['Cp'])
+    loads.compute_loads()
+    stages = profiler.stages
+    assert {'Reader.open', 'Reader.read', 'Cutter.threshold', 'Cutter.cut', 'Cutter.extract', 'Cutter.sort', 'CrossSections.compute_loads'} <= set(stages)
+    assert stages['Reader.open']['cells'] == grid.GetNumberOfCells()
+    assert stages['Cutter.cut']['calls'] == 2 and stages['Cutter.threshold']['calls'] == 1
+    assert stages['Cutter.extract']['points'] == sum(len(xz) for xz in loads.xz_c)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.vtk_utils import Cutter, _grid_to_numpy
+from pycfdutils.slicing import NumpyCutter, _order
+
+# The cutplanes do not go through the points of the grids, where vtkCutter duplicates the points of the cutplanes
+Y_CUTS = np.linspace(0.003, 0.993, 25)
+NORM = [0., 1., 0.]
+
+# The grids have more cells than Cutter.MIN_EXTRACT, so that cut_many extracts the candidate cells of each band
+@pytest.fixture(scope='module')
+def surface():
+    return meshes.surface(40000)
+
+@pytest.fixture(scope='module')
+def volume():
+    return meshes.volume(40000)
+
+def _cut(grid, tag_name, tag_id, tag_dim=2):
+    """Extract the cutplanes created one at a time by Cutter.cut, sorted if they are made of lines
+    """
+    cutter = Cutter(grid)
+    slices = []
+    for y in Y_CUTS:
+        cutter.cut([0., y, 0.], NORM, tag_name, tag_id)
+        slices.append(cutter.extract(['Cp'], tag_dim, sort=tag_dim == 2, copy=True) + (cutter.loops,))
+    return slices
+
+def _sorted(pts, vals):
+    """Sort points and values by coordinates, so that cutplanes can be compared regardless of the order of their points
+    """
+    order = np.lexsort(pts.T)
+    return pts[order], vals[order]
+
+@pytest.mark.parametrize('mesh, tag_id', [('surface', 5), ('volume', 5), ('volume', None)])
+def test_cut_many(mesh, tag_id, request):
+    # The cutplanes of the surface are made of lines, and those of the volume of triangles
+    grid = request.getfixturevalue(mesh)
+    tag_name = None if tag_id is None else 'tag'
+    tag_dim = 2 if mesh == 'surface' else 3
+    cutter = Cutter(grid)
+    cutter.cut_many(Y_CUTS[::-1], NORM, tag_name, tag_id)
+    for i, (pts, elems, vals, loops) in enumerate(_cut(grid, tag_name, tag_id, tag_dim)[::-1]):
+        pts_, elems_, vals_ = cutter.extract(['Cp'], tag_dim, sort=tag_dim == 2, copy=True, slice_id=i)
+        assert len(pts) > 0 and len(elems) > 0
+        np.testing.assert_array_equal(pts_, pts)
+        np.testing.assert_array_equal(elems_, elems)
+        np.testing.assert_array_equal(vals_['Cp'], vals['Cp'])
+        if tag_dim == 2:
+            assert cutter.loops == loops
+
+@pytest.mark.parametrize('mesh, band_size', [('surface', 2**12), ('surface', 0), ('volume', Cutter.BAND_SIZE)])
+def test_cut_many_bands(mesh, band_size):
+    # Extract the candidate cells of small grids, cut the surface by bands of several cutplanes or one by one, and cut
+    # unsorted, repeated and empty cutplanes
+    grid = meshes.surface(2000) if mesh == 'surface' else meshes.volume(2000)
+    tag_dim = 2 if mesh == 'surface' else 3
+    y_cuts = np.concatenate((Y_CUTS[::2], [-0.5, Y_CUTS[3], 1.5], Y_CUTS[1::2]))
+    cutter = Cutter(grid)
+    cutter.BAND_SIZE = band_size
+    cutter.MIN_EXTRACT = 0
+    cutter.cut_many(y_cuts, NORM)
+    ref = Cutter(grid)
+    for i, y in enumerate(y_cuts):
+        ref.cut([0., y, 0.], NORM)
+        if ref.slice.GetNumberOfPoints() == 0:
+            pts, elems, vals = cutter.extract(['Cp'], tag_dim, sort=False, slice_id=i)
+            assert len(pts) == 0 and len(elems) == 0 and len(vals['Cp']) == 0
+            continue
+        pts, elems, vals = ref.extract(['Cp'], tag_dim, sort=False, copy=True)
+        pts_, elems_, vals_ = cutter.extract(['Cp'], tag_dim, sort=False, slice_id=i)
+        assert len(pts) > 0
+        for a, b in zip(_sorted(pts_, vals_['Cp']), _sorted(pts, vals['Cp'])):
+            np.testing.assert_array_equal(a, b)
+        assert len(elems_) == len(elems)
+
+def test_numpy_cutter(surface):
+    cutter = NumpyCutter(_grid_to_numpy(surface))
+    for y, (pts, elems, vals, loops) in zip(Y_CUTS, _cut(surface, 'tag', 5)):
+        cutter.cut([0., y, 0.], NORM, 'tag', 5)
+        pts_, elems_, vals_ = cutter.extract(['Cp'], 2)
+        assert len(pts_) == len(pts) and len(elems_) == len(elems)
+        assert [(end - begin, closed) for begin, end, closed in cutter.loops] == [(end - begin, closed) for begin, end, closed in loops]
+        for a, b in zip(_sorted(pts_, vals_['Cp']), _sorted(pts, vals['Cp'])):
+            np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+
+def test_cut_stencil(surface):
+    stencil = Cutter(surface).cut_stencil(Y_CUTS, NORM, 'tag', 5)
+    data = _grid_to_numpy(surface)
+    cp = data['point/Cp']
+    vals = stencil.interpolate(np.column_stack((cp, 2 * cp)))
+    for i, (pts, elems, vals_ref, loops) in enumerate(_cut(surface, 'tag', 5)):
+        sl = slice(stencil.offsets[i], stencil.offsets[i + 1])
+        for a, b in zip(_sorted(stencil.points[sl], vals[sl, :1]), _sorted(pts, vals_ref['Cp'])):
+            np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(vals[sl, 1], 2 * vals[sl, 0], rtol=0, atol=1e-12)
+
+def test_order():
+    # Two loops of 7 and 5 points and a polyline of 4 points, with shuffled lines and points
+    rng = np.random.default_rng(0)
+    chains = [(np.arange(7), True), (np.arange(7, 12), True), (np.arange(12, 16), False)]
+    elems = np.vstack([np.column_stack((ids, np.roll(ids, -1)))[:len(ids) if closed else -1] for ids, closed in chains])
+    perm = rng.permutation(16)
+    elems = perm[elems[rng.permutation(len(elems))]]
+    elems[::2] = elems[::2, ::-1]
+    pts = rng.random((16, 3))
+    order, sorted_elems, loops = _order(elems, pts)
+    assert sorted(order.tolist()) == list(range(16))
+    assert sorted((end - begin, closed) for begin, end, closed in loops) == [(4, False), (5, True), (7, True)]
+    # Consecutive sorted points are connected, and closed loops are connected end to start
+    lines = {frozenset(e) for e in elems.tolist()}
+    for begin, end, closed in loops:
+        ids = order[begin:end].tolist()
+        pairs = list(zip(ids[:-1], ids[1:])) + ([(ids[-1], ids[0])] if closed else [])
+        assert all(frozenset(p) in lines for p in pairs)
+        if closed:
+            assert pts[ids[0], 0] == pts[ids, 0].max()
+    assert {frozenset(e) for e in order[sorted_elems].tolist()} == lines
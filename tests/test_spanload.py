@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cross_sections import CrossSections
+from pycfdutils.parallel import _slice
+from pycfdutils.spanload import AdaptiveSlicer
+from pycfdutils.vtk_utils import Cutter
+
+@pytest.fixture(scope='module')
+def surface():
+    return meshes.surface(40000)
+
+@pytest.fixture(scope='module')
+def totals(surface):
+    # Integrate the loads of many uniformly distributed sections
+    loads = CrossSections()
+    for y, xz, cp in _slice(Cutter(surface), np.linspace(0.003, 0.993, 400), 'Cp', 'tag', 5):
+        loads.add_section(y, xz, cp)
+    loads.compute_loads(2.)
+    return loads.compute_totals()
+
+@pytest.mark.parametrize('tol', [1e-3, 1e-4])
+def test_convergence(surface, totals, tol):
+    # The stations are refined until the estimated error is below the tolerance, and the actual error follows the estimate
+    slicer = AdaptiveSlicer(surface, 'Cp', 'tag', 5)
+    loads = slicer.run(0.003, 0.993, 2., n_init=5, tol=tol)
+    assert slicer.error <= tol and slicer.iterations > 0
+    assert len(loads) < 50
+    y = loads.y_sec
+    assert y[0] == 0.003 and y[-1] == 0.993 and np.all(np.diff(y) > 0)
+    cl, _, _ = loads.compute_totals()
+    assert abs(cl - totals[0]) < 2 * tol
+    # The loads are computed at the requested angle of attack
+    np.testing.assert_array_equal(loads.cl, loads.compute_loads(2.)[0])
+
+def test_limits(surface):
+    # The refinement stops at the maximum number of sections
+    slicer = AdaptiveSlicer(surface, 'Cp', 'tag', 5)
+    loads = slicer.run(0.003, 0.993, 2., n_init=5, tol=1e-8, max_sections=12)
+    assert len(loads) == 12 and slicer.error > 1e-8
+    # The stations must cross the grid
+    with pytest.raises(RuntimeError):
+        slicer.run(0.003, 1.5)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils.cross_sections import CrossSections
+from pycfdutils.parallel import _slice
+from pycfdutils.surface_loads import SurfaceLoads
+from pycfdutils.vtk_utils import Cutter, _grid_to_numpy, _numpy_to_grid
+
+@pytest.fixture(scope='module')
+def surface():
+    return meshes.surface(100000)
+
+def _reverse(grid):
+    """Copy a grid of triangles, reversing the orientation of its cells
+    """
+    data = _grid_to_numpy(grid)
+    data['connectivity'] = data['connectivity'].reshape(-1, 3)[:, ::-1].ravel()
+    return _numpy_to_grid(data)
+
+def _totals(grid):
+    """Integrate the loads of the cross-sections of a grid along the span
+    """
+    loads = CrossSections()
+    for y, xz, cp in _slice(Cutter(grid), np.linspace(0.0025, 0.9975, 200), 'Cp', 'tag', 5):
+        loads.add_section(y, xz, cp)
+    loads.compute_loads(2.)
+    return loads.compute_totals(s_ref=1., c_ref=1.)
+
+def test_totals(surface):
+    # The suction on the upper side of the wing gives a positive lift, whatever the orientation of the cells
+    ref = _totals(surface)
+    assert ref[0] > 0
+    for grid in [surface, _reverse(surface)]:
+        loads = SurfaceLoads(grid)
+        loads.compute_loads('Cp', 2., 'tag', 5)
+        assert loads.cl == pytest.approx(ref[0], rel=1e-2)
+        assert loads.cm == pytest.approx(ref[1], rel=5e-2)
+        assert loads.cd == pytest.approx(ref[2], rel=1e-2)
+        for a, b in zip(_totals(grid), ref):
+            assert a == pytest.approx(b, rel=1e-12)
+
+def test_orient(surface):
+    # The cells of the synthetic wing point out of the wing, the cells of the reversed wing into the wing
+    loads = SurfaceLoads(surface)
+    loads.compute_loads('Cp', 2., 'tag', 5, orient=False)
+    cl = loads.cl
+    loads = SurfaceLoads(_reverse(surface))
+    loads.compute_loads('Cp', 2., 'tag', 5, orient=False)
+    assert cl > 0 and loads.cl == pytest.approx(-cl, rel=1e-12)
+    # The moment is transferred to the reference point
+    loads.compute_loads('Cp', 2., 'tag', 5, x_ref=[0.25, 0., 0.])
+    cmo = loads.cmo.copy()
+    loads.compute_loads('Cp', 2., 'tag', 5)
+    np.testing.assert_allclose(cmo, loads.cmo - np.cross([0.25, 0., 0.], loads.cf), rtol=0, atol=1e-12)
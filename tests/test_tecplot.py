@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing as mp
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils._vtk import vtk, vtk_to_numpy
+from pycfdutils.tecplot import TecplotReader
+
+@pytest.fixture(scope='module')
+def fname(tmp_path_factory):
+    fname = str(tmp_path_factory.mktemp('tecplot') / 'wing.dat')
+    meshes.write(meshes.surface(2000), fname)
+    return fname
+
+def _read(fname, n_workers=1, chunk_size=TecplotReader.CHUNK_SIZE):
+    """Read a Tecplot file and return the coordinates, the connectivity and the pressure of the first zone
+    """
+    reader = TecplotReader(n_workers)
+    reader.CHUNK_SIZE = chunk_size
+    reader.open(fname)
+    grid = reader.output.GetBlock(0)
+    return _arrays(grid)
+
+def _arrays(grid):
+    """Get copies of the coordinates, the connectivity and the pressure of a grid
+    """
+    return (vtk_to_numpy(grid.GetPoints().GetData()).copy(),
+            vtk_to_numpy(grid.GetCells().GetConnectivityArray()).copy(),
+            vtk_to_numpy(grid.GetPointData().GetArray('Cp')).copy())
+
+def test_vtk(fname):
+    reader = vtk.vtkTecplotReader()
+    reader.SetFileName(fname)
+    reader.Update()
+    pts, conn, cp = _read(fname)
+    pts_ref, conn_ref, cp_ref = _arrays(reader.GetOutput().GetBlock(0))
+    np.testing.assert_allclose(pts, pts_ref, atol=1e-6)
+    np.testing.assert_array_equal(conn, conn_ref)
+    np.testing.assert_allclose(cp, cp_ref, atol=1e-6)
+
+def test_chunks(fname):
+    ref = _read(fname)
+    for a, b in zip(_read(fname, 4, 2**10), ref):
+        np.testing.assert_array_equal(a, b)
+
+def test_pool(fname):
+    # The processes of a pool cannot create processes, so that the chunks are parsed at once
+    ref = _read(fname)
+    with mp.Pool(2) as pool:
+        results = pool.starmap(_read, [(fname, 4, 2**10)] * 2)
+    for result in results:
+        for a, b in zip(result, ref):
+            np.testing.assert_array_equal(a, b)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# pyCFDutils
+# Copyright 2020 Adrien Crovato
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import numpy as np
+import pytest
+from pycfdutils import meshes
+from pycfdutils._vtk import vtk
+from pycfdutils.cross_sections import CrossSections
+from pycfdutils.parallel import _slice
+from pycfdutils.vtk_utils import Reader, Cutter, _grid_to_numpy, _numpy_to_grid, _extract_cells, _candidates
+
+Y_CUTS = np.linspace(0.003, 0.993, 12)
+
+@pytest.fixture(scope='module')
+def surface():
+    return meshes.surface(20000)
+
+def _split(grid, n_pieces):
+    """Split a grid into pieces along the chord, by the x-coordinate of the first point of the cells
+    """
+    data = _grid_to_numpy(grid)
+    x = data['points'][data['connectivity'][data['offsets'][:-1]], 0]
+    bins = np.digitize(x, np.quantile(x, np.linspace(0., 1., n_pieces + 1)[1:-1]))
+    new_ids = np.empty(len(data['points']), dtype=np.int64)
+    return [_numpy_to_grid(_extract_cells(data, np.flatnonzero(bins == i), new_ids)) for i in range(n_pieces)]
+
+def _write_pvtu(pieces, fname):
+    """Write the pieces of a grid to a parallel VTK file
+    """
+    base = os.path.splitext(fname)[0]
+    with open(fname, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<VTKFile type="PUnstructuredGrid" version="1.0">\n<PUnstructuredGrid GhostLevel="0">\n')
+        f.write('<PPoints><PDataArray type="Float64" NumberOfComponents="3"/></PPoints>\n')
+        for i, piece in enumerate(pieces):
+            meshes.write(piece, f'{base}_{i}.vtu')
+            f.write(f'<Piece Source="{os.path.basename(base)}_{i}.vtu"/>\n')
+        f.write('</PUnstructuredGrid>\n</VTKFile>\n')
+
+def _loads(grid):
+    """Compute the sectional loads of a grid
+    """
+    loads = CrossSections()
+    for y, xz, cp in _slice(Cutter(grid, n_workers=1), Y_CUTS, 'Cp', 'tag', 5):
+        loads.add_section(y, xz, cp)
+    return loads.compute_loads(2.)
+
+def test_partitioned(surface, tmp_path):
+    # The loops of the stitched cutplanes start at the trailing edge, whatever the partition
+    pieces = _split(surface, 4)
+    mblock = vtk.vtkMultiBlockDataSet()
+    mblock.SetNumberOfBlocks(len(pieces))
+    for i, piece in enumerate(pieces):
+        mblock.SetBlock(i, piece)
+    fname = str(tmp_path / 'wing.pvtu')
+    _write_pvtu(pieces, fname)
+    reader = Reader()
+    reader.open(fname)
+    ref = _loads(surface)
+    for grid in [mblock, reader.grid]:
+        for a, b in zip(_loads(grid), ref):
+            np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+
+def test_threshold_cache():
+    grid = meshes.volume(2000)
+    cutter = Cutter(grid, cache_size=1)
+    counts = []
+    for tag_id in [5, 5, 1, 5]: # the threshold of tag 5 is evicted by the one of tag 1
+        cutter.cut([0., 0.5, 0.], [0., 1., 0.], 'tag', tag_id)
+        counts.append((cutter.cache_hits, cutter.cache_misses))
+    assert counts == [(0, 1), (1, 1), (1, 2), (1, 3)]
+    n_cells = cutter.slice.GetNumberOfCells()
+    # The threshold is computed again when the grid is modified, or when the cache is cleared
+    grid.Modified()
+    cutter.cut([0., 0.5, 0.], [0., 1., 0.], 'tag', 5)
+    cutter.clear_cache()
+    cutter.cut([0., 0.5, 0.], [0., 1., 0.], 'tag', 5)
+    assert (cutter.cache_hits, cutter.cache_misses) == (1, 5)
+    assert cutter.slice.GetNumberOfCells() == n_cells > 0
+    # Nothing is kept without cache
+    cutter = Cutter(grid, cache_size=0)
+    for _ in range(2):
+        cutter.cut([0., 0.5, 0.], [0., 1., 0.], 'tag', 5)
+    assert (cutter.cache_hits, cutter.cache_misses) == (0, 2)
+    assert cutter.slice.GetNumberOfCells() == n_cells
+
+def test_index():
+    grid = meshes.volume(5000)
+    norm = np.array([0.2, 1., 0.1]) / np.linalg.norm([0.2, 1., 0.1])
+    # The candidates of a range are the cells whose extent along the normal intersects it
+    data = _grid_to_numpy(grid)
+    dist = data['points'][data['connectivity']] @ norm
+    cmin = np.minimum.reduceat(dist, data['offsets'][:-1])
+    cmax = np.maximum.reduceat(dist, data['offsets'][:-1])
+    index = Cutter(grid)._Cutter__build_index(grid, norm)
+    for lower, upper in [(0.3, 0.3), (0.1, 0.4), (-1., -0.5), (cmin[7], cmax[7]), (cmin.min(), cmax.max())]:
+        ids = np.sort(_candidates(index, lower, upper))
+        np.testing.assert_array_equal(ids, np.flatnonzero((cmin <= upper) & (cmax >= lower)))
+        assert _candidates(index, lower, upper, count=True) >= len(ids)
+    # Cutting the candidate cells only gives the same cutplane
+    slices = []
+    for use_index in [False, True]:
+        cutter = Cutter(grid, use_index=use_index)
+        cutter.cut(0.4 * norm, norm, 'tag', 5)
+        pts, _, vals = cutter.extract(['Cp'], 3, sort=False)
+        order = np.lexsort(pts.T)
+        slices.append((pts[order], vals['Cp'][order]))
+    assert len(slices[0][0]) > 0
+    for a, b in zip(*slices):
+        np.testing.assert_array_equal(a, b)
+
+def _arrays(grid):
+    """List the names of the point and cell data of a grid
+    """
+    return sorted(data.GetArrayName(i) for data in [grid.GetPointData(), grid.GetCellData()] for i in range(data.GetNumberOfArrays()))
+
+@pytest.mark.parametrize('ext', ['.vtu', '.vtk', '.dat'])
+def test_reader_arrays(surface, tmp_path, ext):
+    # Only the selected arrays are loaded, and the selected arrays must exist
+    fname = str(tmp_path / f'wing{ext}')
+    meshes.write(surface, fname)
+    reader = Reader()
+    for arrays, names in [(None, ['Cp', 'tag']), (['Cp', 'tag'], ['Cp', 'tag']), (['Cp'], ['Cp']), (['tag'], ['tag'])]:
+        reader.open(fname, arrays)
+        assert _arrays(reader.grid) == names
+        assert reader.grid.GetNumberOfCells() == surface.GetNumberOfCells()
+    with pytest.raises(RuntimeError):
+        reader.open(fname, ['Cp', 'Mach'])
+
+def test_reader_blocks(surface, tmp_path):
+    # Write the two halves of the wing as the zones of a Tecplot file
+    pieces = _split(surface, 2)
+    lines = []
+    for i, (piece, name) in enumerate(zip(pieces, ['front', 'rear'])):
+        meshes.write(piece, str(tmp_path / f'{name}.dat'))
+        with open(tmp_path / f'{name}.dat') as f:
+            zone = f.read().replace('T="wing"', f'T="{name}"').splitlines(keepends=True)
+        lines += zone if i == 0 else zone[2:]
+    fname = str(tmp_path / 'wing.dat')
+    with open(fname, 'w') as f:
+        f.writelines(lines)
+    # Load the first zone by default, one zone by index or name, or several zones merged at their common points
+    reader = Reader()
+    for blocks, piece in [(None, pieces[0]), ([1], pieces[1]), (['rear'], pieces[1]), (['front'], pieces[0])]:
+        reader.open(fname, ['Cp'], blocks)
+        assert reader.grid.GetNumberOfCells() == piece.GetNumberOfCells()
+        np.testing.assert_allclose(meshes.grid_points(reader.grid), meshes.grid_points(piece), rtol=0, atol=1e-10)
+        assert _arrays(reader.grid) == ['Cp']
+    reader.open(fname, ['Cp', 'tag'], ['front', 1])
+    assert reader.grid.GetNumberOfCells() == surface.GetNumberOfCells()
+    assert reader.grid.GetNumberOfPoints() == surface.GetNumberOfPoints()
+    assert _arrays(reader.grid) == ['Cp', 'tag']
+    for blocks in [[2], ['tip']]:
+        with pytest.raises(RuntimeError):
+            reader.open(fname, None, blocks)